@@ -1,10 +1,13 @@
 from pathlib import Path
 
+import starlette.responses
 import starlette.routing
 from shiny import App
 
+from .data_loader import cache_stats
 from .server_logic import server
 from .ui_components import get_ui
+from .warmup import warm_up, warmup_enabled
 
 APP_ROOT = Path(__file__).resolve().parent
 
@@ -17,3 +20,32 @@ if hasattr(app, "_on_connect_cb"):
         0,
         starlette.routing.WebSocketRoute("/websocket", app._on_connect_cb),
     )
+
+
+def cache_stats_endpoint(request):
+    return starlette.responses.JSONResponse(
+        cache_stats(), headers={"Cache-Control": "no-cache"}
+    )
+
+
+# memory used by the shared dataset cache, for monitoring
+app.starlette_app.router.routes.insert(
+    0, starlette.routing.Route("/cache-stats", cache_stats_endpoint)
+)
+
+
+def ready_endpoint(request):
+    # 503 while the warm-up is loading data, so no session lands on a cold worker
+    return starlette.responses.JSONResponse(
+        warm_up.status(),
+        status_code=200 if warm_up.ready else 503,
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+app.starlette_app.router.routes.insert(
+    0, starlette.routing.Route("/ready", ready_endpoint)
+)
+
+if warmup_enabled():
+    warm_up.start()
@@ -1,12 +1,103 @@
 import fnmatch
 import glob
+import hashlib
+import json
 import os
-import re
 import zipfile
 from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .modules.atomic_file import atomic_write
+from .modules.dataset_cache import DatasetCache
+from .modules.figure_cache import FigureCache
+from .modules.gene_index import GeneIndex, normalize_genes
+from .modules.labels import add_label_columns
+from .modules.panel_catalogue import PanelCatalogue
+from .modules.panel_metrics_store import PanelMetricsStore, combo_name, safe_panel_name
+from .modules.phred_histogram import ConsequenceHistogram, PhredHistogram
+from .modules.result_cache import GeneSetResultCache
+from .modules.threshold_cube import ThresholdCountCube
+
+# genome release/CADD version combinations the app ships data for
+VERSIONS = ["1.7_GRCh38", "1.6_GRCh38", "1.7_GRCh37", "1.6_GRCh37"]
+DEFAULT_VERSION = "1.7_GRCh38"
+
+# bump whenever the layout of the columnar cache changes so stale caches get rebuilt
+COLUMNAR_CACHE_FORMAT = 1
+
+# bump whenever the layout of the gene_universe_<version>.json files changes
+GENE_UNIVERSE_FORMAT = 1
+
+# compact dtypes applied at load time; columns missing from a table are skipped and
+# integer columns are only narrowed when all values fit
+VARIANT_TABLE_SCHEMA = {
+    "ClinicalSignificance": "category",
+    "Consequence": "category",
+    "GeneName": "category",
+    "GeneSymbol": "category",
+    "Chromosome": "category",
+    "ReviewStatus": "category",
+    "Origin": "category",
+    "OriginSimple": "category",
+    "Type_ClinVar": "category",
+    "PHRED": "float32",
+    "AlleleID": "int32",
+    "VariationID": "int32",
+    "GeneID_ClinVar": "int32",
+    "NumberSubmitters": "int16",
+    "PositionVCF": "int32",
+    "Pos": "int32",
+}
+
+METRICS_TABLE_SCHEMA = {
+    "Threshold": "int16",
+    "TrueNegatives": "int32",
+    "FalsePositives": "int32",
+    "FalseNegatives": "int32",
+    "TruePositives": "int32",
+    "Support": "int32",
+}
+
+# bytes per loaded table before and after applying the schema, keyed by file name
+_memory_usage = {}
+
+_SIZE_SUFFIXES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_byte_size(value) -> int | None:
+    """Parse sizes such as ``1500000``, ``512M`` or ``2G``; empty or 0 means unlimited."""
+    value = str(value or "").strip().upper().removesuffix("B").removesuffix("I")
+    if not value:
+        return None
+    factor = _SIZE_SUFFIXES.get(value[-1], 1)
+    number = float(value[:-1] if value[-1] in _SIZE_SUFFIXES else value)
+    return int(number * factor) or None
+
+
+def _byte_size_from_env(name, default=None) -> int | None:
+    try:
+        return parse_byte_size(os.getenv(name, default))
+    except ValueError:
+        print(f"Warning: ignoring invalid {name}={os.getenv(name)!r}")
+        return parse_byte_size(default)
+
+
+def _cache_from_env() -> DatasetCache:
+    max_bytes = _byte_size_from_env("CADD_THRESHOLD_CACHE_MAX_BYTES")
+    pinned = os.getenv("CADD_THRESHOLD_CACHE_PIN", DEFAULT_VERSION)
+    return DatasetCache(
+        max_bytes, [version.strip() for version in pinned.split(",") if version.strip()]
+    )
+
+
+# loaded datasets shared by all sessions of the process; bounded by
+# CADD_THRESHOLD_CACHE_MAX_BYTES, versions in CADD_THRESHOLD_CACHE_PIN stay resident
+dataset_cache = _cache_from_env()
 
 
 @lru_cache(maxsize=1)
@@ -19,7 +110,7 @@ def get_data_path() -> Path:
     return Path(from_env).expanduser().resolve()
 
 
-@lru_cache(maxsize=None)
+@dataset_cache.memoize()
 def load_metrics(version):
     data_path = get_data_path()
     path = (
@@ -33,13 +124,13 @@ def load_metrics(version):
             "Fix: place the generated metrics file there, or create a symlink from the repo 'data/' into the package data folder,\n"
             "or run the data generation scripts described in the README."
         )
-    return pd.read_csv(path, low_memory=False)
+    return apply_schema(pd.read_csv(path, low_memory=False), METRICS_TABLE_SCHEMA)
 
 
-@lru_cache(maxsize=None)
+@dataset_cache.memoize()
 def load_metrics_bar(version):
     data_path = get_data_path()
-    path = data_path / f"random_{version}_without_duplicates_renamed.csv.gz"
+    path = variant_table_path(version)
     if not path.exists():
         raise FileNotFoundError(
             f"Bar-plot metrics file not found: {path}\n"
@@ -47,10 +138,472 @@ def load_metrics_bar(version):
             "Fix: place the generated random file there, or create a symlink from the repo 'data/' into the package data folder,\n"
             "or run the data generation scripts described in the README."
         )
-    return pd.read_csv(path, low_memory=False)
+    return add_label_columns(read_variant_table(path))
+
+
+@dataset_cache.memoize()
+def load_gene_index(version) -> GeneIndex:
+    """Return the gene-to-row index of the `load_metrics_bar` table of `version`."""
+    return GeneIndex.from_frame(load_metrics_bar(version))
+
+
+@dataset_cache.memoize()
+def load_threshold_cube(version) -> ThresholdCountCube:
+    """Return the per-gene threshold bin counts of the `load_metrics_bar` table of `version`."""
+    return ThresholdCountCube.from_frame(
+        load_metrics_bar(version), load_gene_index(version)
+    )
+
+
+@dataset_cache.memoize()
+def load_phred_histogram(version) -> PhredHistogram:
+    """Return the counts per 1-wide PHRED bin and label category of the `load_metrics_bar` table of `version`."""
+    return PhredHistogram.from_frame(load_metrics_bar(version))
+
+
+@dataset_cache.memoize()
+def load_consequence_histogram(version) -> ConsequenceHistogram:
+    """Return the (likely) pathogenic counts per consequence and 1-wide PHRED bin of `version`."""
+    return ConsequenceHistogram.from_frame(load_metrics_bar(version))
+
+
+def _coerce_integer(values: pd.Series, dtype: str) -> pd.Series:
+    if not pd.api.types.is_numeric_dtype(values):
+        return values
+    present = values.dropna()
+    info = np.iinfo(dtype)
+    if len(present) and (
+        (present % 1 != 0).any() or present.min() < info.min or present.max() > info.max
+    ):
+        return values
+    if len(present) < len(values):
+        # missing values need the nullable integer type
+        return values.astype(dtype.capitalize())
+    return values.astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Convert the columns of `df` named in `schema` to their compact dtypes in place."""
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        try:
+            if dtype.startswith("int"):
+                df[column] = _coerce_integer(df[column], dtype)
+            else:
+                df[column] = df[column].astype(dtype)
+        except (TypeError, ValueError) as e:
+            print(f"Warning: could not convert column '{column}' to {dtype}: {e}")
+    return df
+
+
+def memory_usage_report() -> pd.DataFrame:
+    """Return the in-memory size of every variant table loaded so far.
+
+    `BytesBefore` is the size with the default dtypes pandas infers from the CSV,
+    `BytesAfter` the size with `VARIANT_TABLE_SCHEMA` applied.
+    """
+    rows = [{"Table": name, **usage} for name, usage in sorted(_memory_usage.items())]
+    report = pd.DataFrame(rows, columns=["Table", "BytesBefore", "BytesAfter"])
+    report["Ratio"] = report["BytesAfter"] / report["BytesBefore"]
+    return report
+
+
+def variant_table_path(version) -> Path:
+    return get_data_path() / f"random_{version}_without_duplicates_renamed.csv.gz"
+
+
+def columnar_cache_paths(path: Path) -> tuple[Path, Path]:
+    """Return the Feather file and its fingerprint sidecar written next to a CSV."""
+    stem = path.name.removesuffix(".gz").removesuffix(".csv")
+    return path.with_name(f"{stem}.feather"), path.with_name(f"{stem}.feather.json")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _schema_signature() -> str:
+    return hashlib.sha256(
+        json.dumps(VARIANT_TABLE_SCHEMA, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _source_fingerprint(path: Path) -> dict:
+    stat = path.stat()
+    return {
+        "format": COLUMNAR_CACHE_FORMAT,
+        "schema": _schema_signature(),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _sha256(path),
+    }
+
+
+def columnar_cache_is_fresh(path: Path) -> bool:
+    """Check whether the columnar cache still matches its source CSV.
+
+    Size and mtime are compared first; if only the mtime differs (e.g. after
+    copying the data directory) the content hash decides.
+    """
+    cache_path, meta_path = columnar_cache_paths(path)
+    if not cache_path.exists():
+        return False
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        stat = path.stat()
+    except (OSError, ValueError):
+        return False
+
+    if (
+        meta.get("format") != COLUMNAR_CACHE_FORMAT
+        or meta.get("schema") != _schema_signature()
+        or meta.get("size") != stat.st_size
+    ):
+        return False
+    if meta.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if meta.get("sha256") != _sha256(path):
+        return False
+
+    # contents unchanged: remember the new mtime so the next check skips hashing
+    meta["mtime_ns"] = stat.st_mtime_ns
+    try:
+        atomic_write(
+            meta_path,
+            lambda tmp: Path(tmp).write_text(json.dumps(meta), encoding="utf-8"),
+        )
+    except OSError:
+        pass
+    return True
+
+
+def write_columnar_cache(path: Path, df: pd.DataFrame) -> Path:
+    """Write `df` as an uncompressed Feather file next to its source CSV `path`."""
+    cache_path, meta_path = columnar_cache_paths(path)
+    fingerprint = _source_fingerprint(path)
+    fingerprint["memory_usage"] = _memory_usage.get(path.name)
+    # uncompressed Arrow IPC can be memory-mapped without decoding
+    atomic_write(
+        cache_path,
+        lambda tmp: feather.write_feather(
+            df.reset_index(drop=True), tmp, compression="uncompressed"
+        ),
+    )
+    atomic_write(
+        meta_path,
+        lambda tmp: Path(tmp).write_text(json.dumps(fingerprint), encoding="utf-8"),
+    )
+    return cache_path
+
+
+def read_variant_table(path: Path) -> pd.DataFrame:
+    """Read a variant table, preferring its memory-mapped columnar cache.
+
+    Falls back to parsing the CSV when the cache is missing, stale or unreadable,
+    and then tries to (re)write the cache so the next load is fast.
+    """
+    if columnar_cache_is_fresh(path):
+        cache_path, meta_path = columnar_cache_paths(path)
+        try:
+            df = feather.read_table(cache_path, memory_map=True).to_pandas()
+            usage = json.loads(meta_path.read_text(encoding="utf-8")).get(
+                "memory_usage"
+            )
+            if usage:
+                _memory_usage[path.name] = usage
+            return df
+        except (OSError, ValueError, pa.ArrowException) as e:
+            print(f"Warning: failed to read columnar cache {cache_path}: {e}")
+
+    df = _read_variant_csv(path)
+    try:
+        write_columnar_cache(path, df)
+    except (OSError, pa.ArrowException) as e:
+        print(f"Warning: could not write columnar cache for {path}: {e}")
+    return df
+
+
+def _read_variant_csv(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path, low_memory=False)
+    bytes_before = int(df.memory_usage(deep=True).sum())
+    apply_schema(df, VARIANT_TABLE_SCHEMA)
+    _memory_usage[path.name] = {
+        "BytesBefore": bytes_before,
+        "BytesAfter": int(df.memory_usage(deep=True).sum()),
+    }
+    return df
+
+
+def dataset_fingerprint(version) -> str:
+    """Return the SHA-256 of the variant table of `version`.
+
+    Reuses the hash recorded by the columnar cache when it is still fresh, and
+    remembers it as long as the table's size and mtime do not change.
+    """
+    path = variant_table_path(version)
+    stat = path.stat()
+    return _dataset_fingerprint(path, stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _dataset_fingerprint(path: Path, size: int, mtime_ns: int) -> str:
+    if columnar_cache_is_fresh(path):
+        try:
+            _, meta_path = columnar_cache_paths(path)
+            return json.loads(meta_path.read_text(encoding="utf-8"))["sha256"]
+        except (OSError, ValueError, KeyError):
+            pass
+    return _sha256(path)
+
+
+# per-gene-set results (metrics, label counts) shared by all sessions; bounded by
+# CADD_THRESHOLD_RESULT_CACHE_MAX_BYTES and kept on disk in CADD_THRESHOLD_RESULT_CACHE_DIR
+result_cache = GeneSetResultCache(
+    _byte_size_from_env("CADD_THRESHOLD_RESULT_CACHE_MAX_BYTES", "256M"),
+    os.getenv("CADD_THRESHOLD_RESULT_CACHE_DIR") or None,
+    dataset_fingerprint,
+)
 
 
-@lru_cache(maxsize=None)
+# serialized figures of the pages that only depend on version/metric/range inputs;
+# bounded by CADD_THRESHOLD_FIGURE_CACHE_MAX_BYTES
+figure_cache = FigureCache(
+    _byte_size_from_env("CADD_THRESHOLD_FIGURE_CACHE_MAX_BYTES", "64M")
+)
+
+
+def cache_stats() -> dict:
+    """Return the counters and entry sizes of the shared caches (for monitoring)."""
+    return {
+        "datasets": dataset_cache.stats(),
+        "gene_set_results": result_cache.stats(),
+        "figures": figure_cache.stats(),
+    }
+
+
+def build_columnar_cache(version, force: bool = False) -> Path:
+    """Convert the variant table of `version` into its columnar cache."""
+    path = variant_table_path(version)
+    if not path.exists():
+        raise FileNotFoundError(f"Bar-plot metrics file not found: {path}")
+    if not force and columnar_cache_is_fresh(path):
+        return columnar_cache_paths(path)[0]
+    return write_columnar_cache(path, _read_variant_csv(path))
+
+
+def gene_universe_path(version) -> Path:
+    return get_data_path() / f"gene_universe_{version}.json"
+
+
+@lru_cache(maxsize=len(VERSIONS))
+def _read_gene_universe(path: Path, mtime_ns: int) -> dict | None:
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    if stored.get("format") != GENE_UNIVERSE_FORMAT:
+        return None
+    return {**stored, "genes": frozenset(stored["genes"])}
+
+
+def _table_stat(version) -> tuple[int, int]:
+    stat = variant_table_path(version).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _stored_gene_universe(version, verify: bool = True) -> frozenset | None:
+    """Return the stored gene universe of `version` if it is still fresh.
+
+    An entry is fresh while the table's size and mtime are unchanged; otherwise, with
+    `verify`, the table's fingerprint decides (which may hash the table).
+    """
+    path = gene_universe_path(version)
+    try:
+        entry = _read_gene_universe(path, path.stat().st_mtime_ns)
+        if not entry:
+            return None
+        if [entry["size"], entry["mtime_ns"]] == list(_table_stat(version)) or (
+            verify and entry["fingerprint"] == dataset_fingerprint(version)
+        ):
+            return entry["genes"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def stored_gene_universe(version) -> frozenset | None:
+    """Return the gene universe of `version` if its file holds it, else None.
+
+    Never loads or hashes the variant table, so it is safe to call while rendering;
+    `load_gene_universe` (warm-up, build-cache) stores the universes it reads.
+    """
+    return _stored_gene_universe(version, verify=False)
+
+
+def _store_gene_universe(version, genes: frozenset) -> None:
+    # one file per version, replaced atomically: concurrent writers of different
+    # versions never touch the same file, and the last of the same version wins
+    size, mtime_ns = _table_stat(version)
+    stored = {
+        "format": GENE_UNIVERSE_FORMAT,
+        "fingerprint": dataset_fingerprint(version),
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "genes": sorted(genes),
+    }
+    atomic_write(
+        gene_universe_path(version),
+        lambda tmp: Path(tmp).write_text(json.dumps(stored), encoding="utf-8"),
+    )
+
+
+@dataset_cache.memoize()
+def load_gene_universe(version) -> frozenset:
+    """Return the normalized gene symbols of the variant table of `version`.
+
+    Multi-gene GeneName entries contribute each of their genes. The symbols are
+    kept in gene_universe_<version>.json in the data folder, so later processes get them
+    without loading the table until its fingerprint changes. May load the table:
+    call it off the event loop.
+    """
+    genes = _stored_gene_universe(version)
+    if genes is None:
+        genes = load_gene_index(version).symbols
+        try:
+            _store_gene_universe(version, genes)
+        except OSError as e:
+            print(f"Warning: could not write {gene_universe_path(version)}: {e}")
+    return genes
+
+
+def gene_availability(genes, versions=None, stored_only: bool = False) -> pd.DataFrame:
+    """Return which of `genes` occur in which version, one boolean column per version.
+
+    Versions whose table is missing count as containing no genes. With
+    `stored_only`, only versions whose universe is already stored (see
+    `stored_gene_universe`) get a column and no table is loaded.
+    """
+    index = pd.Index(sorted(normalize_genes(genes)), name="Gene")
+    availability = {}
+    for version in versions or VERSIONS:
+        if stored_only:
+            universe = stored_gene_universe(version)
+            if universe is None:
+                continue
+        else:
+            try:
+                universe = load_gene_universe(version)
+            except FileNotFoundError:
+                universe = frozenset()
+        availability[version] = index.isin(universe)
+    return pd.DataFrame(availability, index=index)
+
+
+@lru_cache(maxsize=1)
+def _newest_panels_summary(paneldata_dir: Path, dir_mtime_ns: int) -> Path | None:
+    matches = glob.glob(str(paneldata_dir / "panels_summary_*.csv"))
+    if not matches:
+        return None
+    return Path(max(matches, key=os.path.getmtime))
+
+
+def panels_summary_path() -> Path | None:
+    """Return the most recently modified panels_summary_*.csv, or None.
+
+    The directory is only searched again after files were added, removed or renamed.
+    """
+    paneldata_dir = get_data_path() / "paneldata"
+    try:
+        dir_mtime_ns = paneldata_dir.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _newest_panels_summary(paneldata_dir, dir_mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def _open_panel_catalogue(path: Path, mtime_ns: int) -> PanelCatalogue:
+    return PanelCatalogue.from_csv(path)
+
+
+def load_panel_catalogue() -> PanelCatalogue | None:
+    """Return the catalogue of the newest panels summary, or None if there is none.
+
+    The summary is parsed once and reread only when a newer file appears or the
+    file itself changes.
+    """
+    path = panels_summary_path()
+    if path is None:
+        print(
+            "Warning: no panels summary files found matching: "
+            f"{get_data_path() / 'paneldata' / 'panels_summary_*.csv'}"
+        )
+        return None
+    try:
+        return _open_panel_catalogue(path, path.stat().st_mtime_ns)
+    except Exception as e:
+        print(f"Warning: failed to read panels summary {path}: {e}")
+        return None
+
+
+def panel_metrics_store_path() -> Path:
+    return get_data_path() / "paneldata" / "panel_metrics" / "panel_metrics.feather"
+
+
+@lru_cache(maxsize=1)
+def _open_panel_metrics_store(path: Path, mtime_ns: int) -> PanelMetricsStore:
+    table = feather.read_table(path, memory_map=True).to_pandas()
+    return PanelMetricsStore(table)
+
+
+def load_panel_metrics_store() -> PanelMetricsStore | None:
+    """Return the consolidated panel metrics store, or None if it cannot be used.
+
+    The store is opened (memory-mapped and indexed) once and reopened only after
+    the batch job replaced the file. A missing store is expected; a store that
+    exists but cannot be read is reported as an error, since the app then falls
+    back to the legacy per-panel files.
+    """
+    path = panel_metrics_store_path()
+    try:
+        return _open_panel_metrics_store(path, path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, pa.ArrowException) as e:
+        print(
+            f"Error: cannot read panel metrics store {path} ({e}); "
+            "falling back to the legacy per-panel metrics files"
+        )
+        return None
+
+
+def write_panel_metrics_store(table: pd.DataFrame) -> Path:
+    """Replace the panel metrics store with `table` (see `panel_metrics_table`)."""
+    path = panel_metrics_store_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(
+        path,
+        lambda tmp: feather.write_feather(table, tmp, compression="uncompressed"),
+    )
+    return path
+
+
+def load_panel_metrics(panel_name, cadd_ver):
+    """Load the precomputed metrics of a panel or return None.
+
+    Looks the panel up in the consolidated store and falls back to the per-panel
+    CSVs in zip files written by older versions of the batch job.
+    """
+    store = load_panel_metrics_store()
+    if store is not None:
+        df = store.metrics(panel_name, cadd_ver)
+        if df is not None:
+            return df
+    return load_panel_metrics_from_zip(panel_name, cadd_ver)
+
+
+@dataset_cache.memoize(pinnable=False)
 def load_panel_metrics_from_zip(panel_name, cadd_ver):
     """Load precomputed panel metrics from zip file or return None.
 
@@ -58,17 +611,10 @@ def load_panel_metrics_from_zip(panel_name, cadd_ver):
     `CADD_THRESHOLD_DATA_PATH` (via `get_data_path()`) and searches under
     `paneldata/panel_metrics` for a zip file matching the genome+CADD combo.
     """
-    safe_panel = re.sub(r"[^0-9A-Za-z._-]", "_", str(panel_name).strip())
+    safe_panel = safe_panel_name(panel_name)
     output_dir = str(get_data_path() / "paneldata" / "panel_metrics")
 
-    combo_folder = None
-    if isinstance(cadd_ver, str) and "_" in cadd_ver:
-        parts = cadd_ver.split("_")
-        if len(parts) >= 2:
-            cadd_short = parts[0]
-            genome = parts[1]
-            combo_folder = f"{genome}_{cadd_short}"
-
+    combo_folder = combo_name(cadd_ver)
     if not combo_folder:
         return None
 
@@ -5,6 +5,8 @@ from pathlib import Path
 
 import click
 
+DATA_OPTION_HELP = "Directory containing precomputed input CSV files. Data can be downloaded via https://doi.org/10.5281/zenodo.19204078"
+
 
 @click.command()
 @click.option("--host", default="127.0.0.1", show_default=True, help="Host to bind")
@@ -13,13 +15,20 @@ import click
     "--data",
     type=click.Path(file_okay=False, dir_okay=True, exists=True, path_type=str),
     default=None,
-    help="Directory containing precomputed input CSV files. Data can be downloaded via https://doi.org/10.5281/zenodo.19204078",
+    help=DATA_OPTION_HELP,
+)
+@click.option(
+    "--warmup",
+    is_flag=True,
+    help="Load all versions and the default figures in the background at startup; /ready answers 503 until done",
 )
-def main(host: str, port: int, data: str | None) -> None:
+def main(host: str, port: int, data: str | None, warmup: bool) -> None:
 
     env = os.environ.copy()
     if data:
         env["CADD_THRESHOLD_DATA_PATH"] = data
+    if warmup:
+        env["CADD_THRESHOLD_WARMUP"] = "1"
     if "CADD_THRESHOLD_DATA_PATH" in env:
         path = Path(env["CADD_THRESHOLD_DATA_PATH"]).expanduser().resolve()
         if not path.exists():
@@ -54,5 +63,51 @@ def main(host: str, port: int, data: str | None) -> None:
     )
 
 
+@click.command()
+@click.option(
+    "--data",
+    type=click.Path(file_okay=False, dir_okay=True, exists=True, path_type=str),
+    default=None,
+    help=DATA_OPTION_HELP,
+)
+@click.option(
+    "--version",
+    "versions",
+    multiple=True,
+    help="Genome release and CADD version to convert (e.g. 1.7_GRCh38). Defaults to all.",
+)
+@click.option(
+    "--force", is_flag=True, help="Rebuild caches even if they are up to date"
+)
+def build_cache(data: str | None, versions: tuple, force: bool) -> None:
+    """Convert the variant CSV tables into memory-mappable columnar caches and record their genes."""
+    if data:
+        os.environ["CADD_THRESHOLD_DATA_PATH"] = data
+
+    from .data_loader import (
+        VERSIONS,
+        build_columnar_cache,
+        load_gene_universe,
+        memory_usage_report,
+    )
+
+    failed = False
+    for version in versions or VERSIONS:
+        try:
+            cache_path = build_columnar_cache(version, force=force)
+            genes = load_gene_universe(version)
+            print(f"{version}: {cache_path} ({len(genes)} genes)")
+        except OSError as e:
+            print(f"{version}: failed to build columnar cache: {e}")
+            failed = True
+
+    report = memory_usage_report()
+    if not report.empty:
+        print("In-memory size per table (default dtypes -> compact schema):")
+        print(report.to_string(index=False))
+    if failed:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
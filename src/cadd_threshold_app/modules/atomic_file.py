@@ -0,0 +1,30 @@
+"""Atomic replacement of the cache files, sidecars and stores the app writes.
+
+Files are written to a temporary file next to the target and moved into place, so
+readers never see a half-written file. They get the permissions of a newly created
+file (0666 minus the umask), not the 0600 of the temporary file: caches are often
+built as one user (e.g. root while building a container) and read by another (the
+`shiny` user of shiny-server)."""
+
+import os
+import tempfile
+from pathlib import Path
+
+# the umask can only be read by setting it; do so once, before any threads start
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def atomic_write(target: Path, write) -> None:
+    """Call `write(tmp_name)` to fill a temporary file, then move it to `target`."""
+    target = Path(target)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    os.close(fd)
+    try:
+        write(tmp_name)
+        os.chmod(tmp_name, FILE_MODE)
+        os.replace(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
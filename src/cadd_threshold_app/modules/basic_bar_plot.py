@@ -1,53 +1,103 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
-from .functions_server_helpers import categorize_label
+from .paged_table import page_count
+from .phred_histogram import PhredHistogram
 
+# genes per page of the gene distribution; all genes not on the page share one bar
+TOP_GENE_CHOICES = ["25", "50", "100", "250"]
+DEFAULT_TOP_GENES = 50
+OTHER_GENES_LABEL = "{} other genes"
+# from this many bars on, the totals above the bars are drawn with WebGL
+WEBGL_MIN_BARS = 100
 
-def make_basic_bar_plot(
-    df: pd.DataFrame,
+
+def make_basic_bar_plot_from_histogram(
+    histogram: PhredHistogram,
     steps: int,
-    type: str,
     title_text: str,
     xaxis_text: str,
     yaxis_text: str,
     legend_text: str,
     range_xaxis: list,
-) -> pd.DataFrame:
-    """This function creates a stacked bar plot showing the distribution of ClinVar variants
-    across PHRED score thresholds or genes in steps of given size.
-    Type can be "standard" for PHRED score bins or "gene" for gene-wise distribution.
-    """
-    if df is None or df.empty:
+):
+    """Stacked bar plot of the variants per PHRED bin of `steps` points and label category."""
+    grouped = histogram.binned(steps)
+    if grouped.empty:
         return go.Figure()
+    return _stacked_bar_figure(
+        grouped,
+        "standard",
+        title_text,
+        xaxis_text,
+        yaxis_text,
+        legend_text,
+        range_xaxis,
+    )
 
-    data = df.copy()
-    data["category"] = data["ClinicalSignificance"].apply(categorize_label)
 
-    if type == "standard":
+def top_genes(counts: pd.DataFrame, top_n, page=1):
+    """Return the rows of page `page` (1-based, clamped) of `counts` in pages of `top_n` genes.
 
-        bins = range(0, 100 + steps, steps)
-        labels = [f"{i}-{i + steps}" for i in range(0, 100, steps)]
-        data["score_bin"] = pd.cut(
-            data["PHRED"], bins=bins, labels=labels, include_lowest=True, right=False
-        )
+    All genes not on the page are summed up in a last "other genes" row. Also returns
+    the page number.
+    """
+    top_n = max(1, int(top_n))
+    page = min(max(1, int(page or 1)), page_count(len(counts), top_n))
+    start = (page - 1) * top_n
+    stop = start + top_n
+    window = counts.iloc[start:stop]
+    labels = list(window.index.astype(str))
+    values = window.to_numpy()
+    n_other = len(counts) - len(window)
+    if n_other:
+        labels.append(OTHER_GENES_LABEL.format(n_other))
+        values = np.vstack([values, counts.to_numpy().sum(axis=0) - values.sum(axis=0)])
+    grouped = pd.DataFrame(
+        values, index=pd.Index(labels, name=counts.index.name), columns=counts.columns
+    )
+    return grouped, page
 
-        grouped = (
-            data.groupby(["score_bin", "category"], observed=True)
-            .size()
-            .unstack(fill_value=0)
-        )
-        grouped = grouped.reindex(labels, fill_value=0)
-
-    if type == "gene":
-        data["category"] = data["ClinicalSignificance"].apply(categorize_label)
-        grouped = (
-            data.groupby([data["GeneName"], "category"], observed=True)
-            .size()
-            .unstack(fill_value=0)
+
+def make_gene_bar_plot(
+    counts: pd.DataFrame,
+    top_n,
+    page,
+    title_text: str,
+    xaxis_text: str,
+    yaxis_text: str,
+    legend_text: str,
+):
+    """Stacked bar plot of page `page` of the genes of `counts`.
+
+    `counts` holds the variants per gene (rows, most variants first) and label
+    category (columns), e.g. a `gene_set_label_counts` table indexed by GeneName.
+
+    Only `top_n` genes and the "other genes" bar are drawn however many genes `counts`
+    holds; `top_n` None draws every gene.
+    """
+    if counts is None or counts.empty:
+        return go.Figure()
+    if top_n is not None and len(counts) > int(top_n):
+        top_n = int(top_n)
+        grouped, page = top_genes(counts, top_n, page)
+        first = (page - 1) * top_n + 1
+        last = min(page * top_n, len(counts))
+        xaxis_text = (
+            f"{xaxis_text} (genes {first}-{last} of {len(counts)}, "
+            f"page {page} of {page_count(len(counts), top_n)})"
         )
-        grouped = grouped.loc[grouped.sum(axis=1).sort_values(ascending=False).index]
+    else:
+        grouped = counts.set_axis(counts.index.astype(str), axis=0)
+    return _stacked_bar_figure(
+        grouped, "gene", title_text, xaxis_text, yaxis_text, legend_text, None
+    )
 
+
+def _stacked_bar_figure(
+    grouped, type, title_text, xaxis_text, yaxis_text, legend_text, range_xaxis
+):
     fig = go.Figure()
     colors = {
         "pathogenic": "#7b3294",
@@ -69,17 +119,22 @@ def make_basic_bar_plot(
             )
         )
 
-    # Add "total count of variants"-annotations on top of each bar
+    # Label the total count of variants on top of each bar with a single text trace
+    # (one layout annotation per bar gets slow to build and to draw for many bars)
     totals = grouped.sum(axis=1)
-    for i, total in enumerate(totals):
-        fig.add_annotation(
-            x=grouped.index[i],
-            y=total,
-            text=str(total),
-            showarrow=False,
-            yshift=10,
-            font=dict(size=10, color="black", family="Arial Black"),
+    text_trace = go.Scattergl if len(grouped) >= WEBGL_MIN_BARS else go.Scatter
+    fig.add_trace(
+        text_trace(
+            x=grouped.index.astype(str),
+            y=totals,
+            text=totals.astype(str),
+            mode="text",
+            textposition="top center",
+            textfont=dict(size=10, color="black", family="Arial Black"),
+            hoverinfo="skip",
+            showlegend=False,
         )
+    )
 
     # Configure x-axis: for gene-distributions we want the full category autorange
     if type == "gene" or not range_xaxis:
@@ -0,0 +1,143 @@
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def sizeof(value) -> int:
+    """Estimate the resident bytes of a cached value."""
+    if value is None:
+        return 0
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(value, (set, frozenset, list, tuple)):
+        # e.g. the gene universes: the container plus its strings
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class DatasetCache:
+    """Least-recently-used cache of loaded datasets with a byte budget.
+
+    Values are weighed with `sizeof` when stored. Once the total exceeds
+    `max_bytes`, the least recently used entries are evicted until it fits again;
+    entries of pinnable functions whose arguments include a pinned value (e.g. the
+    default version) are never evicted. A newly stored entry is kept even if it
+    alone exceeds the budget. `max_bytes=None` disables eviction.
+    """
+
+    def __init__(self, max_bytes: int | None = None, pinned=()):
+        self.max_bytes = max_bytes
+        self.pinned = frozenset(pinned)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._pinnable = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(nbytes for _, nbytes in self._entries.values())
+
+    def _is_pinned(self, key) -> bool:
+        name, args = key
+        return name in self._pinnable and any(arg in self.pinned for arg in args)
+
+    def get(self, key, load):
+        """Return the cached value of `key`, calling `load()` on a miss.
+
+        Concurrent misses of the same key load it only once.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                self.misses += 1
+            value = load()
+            nbytes = sizeof(value)
+            with self._lock:
+                self._entries[key] = (value, nbytes)
+                self._key_locks.pop(key, None)
+                self._evict(keep=key)
+        return value
+
+    def _evict(self, keep) -> None:
+        if self.max_bytes is None:
+            return
+        total = self.nbytes
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep or self._is_pinned(key):
+                continue
+            total -= self._entries.pop(key)[1]
+            self.evictions += 1
+
+    def clear(self, name=None) -> None:
+        """Drop all entries, or only those of the function called `name`."""
+        with self._lock:
+            for key in list(self._entries):
+                if name is None or key[0] == name:
+                    del self._entries[key]
+
+    def memoize(self, pinnable: bool = True):
+        """Decorator caching a function by its positional arguments, like `lru_cache`.
+
+        Results of functions that are not `pinnable` are evicted regardless of
+        their arguments.
+        """
+
+        def decorator(func):
+            name = func.__qualname__
+            if pinnable:
+                self._pinnable.add(name)
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                return self.get((name, args), lambda: func(*args))
+
+            wrapper.cache_clear = functools.partial(self.clear, name)
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and the size of every entry."""
+        with self._lock:
+            entries = [
+                {
+                    "function": name,
+                    "args": [str(arg) for arg in args],
+                    "bytes": nbytes,
+                    "pinned": self._is_pinned((name, args)),
+                }
+                for (name, args), (_, nbytes) in self._entries.items()
+            ]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": sum(entry["bytes"] for entry in entries),
+                "max_bytes": self.max_bytes,
+                "entries": entries,
+            }
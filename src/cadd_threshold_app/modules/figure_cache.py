@@ -0,0 +1,74 @@
+import functools
+import json
+import threading
+from collections import Counter
+
+import plotly.graph_objects as go
+
+from .dataset_cache import DatasetCache
+
+
+def _freeze(value):
+    # input values such as checkbox selections and slider ranges arrive as lists
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def figure_widget(figure_json: str) -> go.FigureWidget:
+    """Return a FigureWidget of a figure serialized by `FigureCache`.
+
+    The JSON was produced from a validated figure, so it is not validated again.
+    Must be called inside a render function (shinywidgets needs the session).
+    """
+    return go.FigureWidget(json.loads(figure_json), _validate=False)
+
+
+class FigureCache:
+    """Process-wide LRU cache of serialized Plotly figures, keyed by plot kind and inputs.
+
+    Figures of functions decorated with `memoize(kind)` are built once per distinct
+    argument tuple and shared by all sessions as JSON strings, which are also cheap
+    to send back from a process pool. Hits and misses are counted per kind.
+    """
+
+    def __init__(self, max_bytes: int | None = None):
+        self.memory = DatasetCache(max_bytes)
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def get(self, kind, args, build) -> str:
+        """Return the JSON of the figure `build()` makes for `kind` and `args`."""
+        built = []
+
+        def load():
+            built.append(True)
+            return build().to_json()
+
+        figure_json = self.memory.get((kind, _freeze(args)), load)
+        with self._lock:
+            (self.misses if built else self.hits)[kind] += 1
+        return figure_json
+
+    def memoize(self, kind):
+        """Decorator caching the figure a function returns as JSON, by its positional arguments."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                return self.get(kind, args, lambda: func(*args))
+
+            wrapper.cache_clear = functools.partial(self.memory.clear, kind)
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        with self._lock:
+            stats["kinds"] = {
+                kind: {"hits": self.hits[kind], "misses": self.misses[kind]}
+                for kind in sorted(set(self.hits) | set(self.misses))
+            }
+        return stats
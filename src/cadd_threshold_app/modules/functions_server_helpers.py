@@ -3,69 +3,36 @@ import os
 import re
 import typing as _typing
 from datetime import datetime
-from io import StringIO
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from sklearn.metrics import (
-    accuracy_score,
-    balanced_accuracy_score,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-)
 
-from ..data_loader import get_data_path
-from .read_genes_from_list_or_file_functions import genes_from_list_or_file
+from ..data_loader import (
+    get_data_path,
+    load_gene_index,
+    load_metrics_bar,
+    load_panel_catalogue,
+    load_threshold_cube,
+    result_cache,
+)
+from .gene_index import GeneIndex
+from .labels import LABEL_COLUMNS, label_categories
+from .read_genes_from_list_or_file_functions import (
+    genes_from_list_or_file,
+    select_genes,
+)
 
 APP_ROOT = Path(__file__).resolve().parents[1]
 
 
-def categorize_label(label):
-    label_lower = str(label).lower()
-    if (
-        "pathogenic" in label_lower and "likely" not in label_lower
-    ) or "pathogenic/likely risk allele" in label_lower:
-        return "pathogenic"
-    elif "likely pathogenic" in label_lower:
-        return "likely pathogenic"
-    elif "benign" in label_lower and "likely" not in label_lower:
-        return "benign"
-    elif "likely benign" in label_lower:
-        return "likely benign"
-    else:
-        return "unknown"
-
-
 # from a file for a row get column as list of genes
 def get_column_as_gene_list(panel_name):
-    # Load the most recent panels_summary_*.csv from configured data path
-    pattern = str(get_data_path() / "paneldata" / "panels_summary_*.csv")
-    matches = glob.glob(pattern)
-    if not matches:
-        print(f"Warning: no panels summary files found matching: {pattern}")
-        return []
-
-    panels_summary_path = max(matches, key=os.path.getmtime)
-    try:
-        df = pd.read_csv(panels_summary_path)
-    except Exception as e:
-        print(f"Warning: failed to read panels summary {panels_summary_path}: {e}")
-        return []
-
-    try:
-        gene_list_str = df.loc[df["Name"] == panel_name, "Genes"].values[0]
-        # split on common delimiters and normalize
-        gene_list = [
-            gene.strip().strip("[]'\"").upper()
-            for gene in re.split(r"[;,]", str(gene_list_str))
-            if gene.strip()
-        ]
-        return gene_list
-    except Exception:
+    # genes of the panel in the most recent panels_summary_*.csv
+    catalogue = load_panel_catalogue()
+    if catalogue is None:
         return []
+    return catalogue.genes(panel_name)
 
 
 def get_paneldata_date(as_string: bool = True) -> _typing.Optional[str]:
@@ -84,165 +51,137 @@ def get_paneldata_date(as_string: bool = True) -> _typing.Optional[str]:
                 return None
 
 
-def entry_has_matching_gene(gene_entry, list_genes, file_genes):
-    genes = genes_from_list_or_file(list_genes, file_genes) or []
-    # Coerce non-string values (e.g. float/NaN from CSVs) to empty/string
-    try:
-        if pd.isna(gene_entry):
-            gene_entry_str = ""
-        else:
-            gene_entry_str = str(gene_entry)
-    except Exception:
-        gene_entry_str = str(gene_entry)
-
-    gene_set = {g.strip() for g in re.split(r"[;,\s]+", gene_entry_str) if g}
-    return not set(genes).isdisjoint(gene_set)
+def find_missing_genes(gene_universe, list_genes, file_genes):
+    """Report which of the given genes occur in `gene_universe`.
 
+    `gene_universe` is the set of normalized gene symbols of the used table (see
+    `data_loader.load_gene_universe`).
+    """
+    selection = select_genes(list_genes, file_genes)
+    genes = selection.genes
 
-def find_missing_genes(data, list_genes, file_genes):
-    df = data.copy()
-    genes = genes_from_list_or_file(list_genes, file_genes)
-
-    if df is None or df.empty:
+    if not gene_universe:
         return "No dataset loaded for the selected version."
 
     if genes is None:
-        if list_genes and file_genes:
-            return "You can either put a list in the text field or upload a file, not both."
-        elif not list_genes and not file_genes:
-            return "You must input a gene list or upload a file."
-        else:
-            return "Something went wrong while processing your input."
+        return selection.message
 
-    df_genes = set(df["GeneName"].astype(str).str.strip().str.upper())
-    missing = set(genes) - df_genes
+    genes = set(genes)
+    missing = genes - gene_universe
 
     if missing:
-        return f"Genes not found in the used database: {', '.join(sorted(missing))} ------- Genes found: {', '.join(sorted(df_genes & set(genes)))}"
+        return f"Genes not found in the used database: {', '.join(sorted(missing))} ------- Genes found: {', '.join(sorted(genes & gene_universe))}"
     else:
         return f"All genes were found in the used database. Genes: {', '.join(sorted(genes))}"
 
 
-def filtered_data_by_given_genes(data, list_genes, file_genes):
+def describe_gene_availability(availability: pd.DataFrame, version) -> str:
+    """Name the other versions that contain the genes missing from `version`.
+
+    `availability` is a `data_loader.gene_availability` table.
+    """
+    missing = availability[~availability[version]]
+    found_elsewhere = [
+        f"{gene} ({', '.join(missing.columns[row])})"
+        for gene, row in zip(missing.index, missing.to_numpy())
+        if row.any()
+    ]
+    if not found_elsewhere:
+        return ""
+    return f" ------- Found in other versions: {'; '.join(found_elsewhere)}"
+
+
+def filtered_data_by_given_genes(data, list_genes, file_genes, gene_index=None):
+    """Return the rows of `data` whose GeneName entry contains any of the given genes.
+
+    Pass the `GeneIndex` built for `data` (see `data_loader.load_gene_index`) to
+    avoid re-indexing the table on every call.
+    """
     if "GeneName" not in data.columns:
         raise ValueError("The uploaded CSV must contain a 'gene' column.")
 
-    data["GeneName"] = data["GeneName"].astype(str).str.strip()
-    mask = data["GeneName"].apply(
-        lambda gene_entry: entry_has_matching_gene(gene_entry, list_genes, file_genes)
-    )
-    df_filtered = data[mask].copy()
-
-    return df_filtered
+    genes = genes_from_list_or_file(list_genes, file_genes) or []
+    if gene_index is None:
+        gene_index = GeneIndex.from_frame(data)
+    return gene_index.take(data, genes)
 
 
-def calculate_metrics(data: pd.DataFrame) -> pd.DataFrame:
-    """This function calculates various metrics at different PHRED score thresholds for the provided data"""
+def gene_set_metrics(version, genes) -> pd.DataFrame:
+    """Per-threshold metrics for the variants of `genes`, shared across sessions."""
+    genes = list(genes or [])
+    return result_cache.get(
+        "metrics", version, genes, lambda: load_threshold_cube(version).metrics(genes)
+    )
 
-    data["ClinicalSignificance"] = data["ClinicalSignificance"].apply(categorize_label)
 
-    # Create a binary ground-truth column for metric calculations. Map
-    # 'likely pathogenic' -> 'pathogenic' and 'likely benign' -> 'benign'.
-    # Any unknown/other labels are treated as 'benign' for the purposes of
-    # these binary metrics (this mirrors the historical behavior of
-    # mapping likely->pathogenic for metrics while preserving original labels
-    # for display elsewhere).
-    data["binary_truth"] = np.where(
-        data["ClinicalSignificance"].isin(["pathogenic", "likely pathogenic"]),
-        "pathogenic",
-        "benign",
+def gene_set_label_counts(version, genes) -> pd.DataFrame:
+    """Variants per gene and label category for `genes`, shared across sessions."""
+    genes = list(genes or [])
+    return result_cache.get(
+        "label_counts",
+        version,
+        genes,
+        lambda: make_data_frame_counting_label_occurences_by_genes(
+            load_gene_index(version).take(load_metrics_bar(version), genes)
+        ),
     )
 
-    thresholds = np.arange(1, 100, step=1)
-    data = data.sort_values("PHRED")
-
-    rows = []
-
-    # If there is no data after filtering, return rows of zeros for each threshold
-    if data is None or data.empty:
-        for threshold in thresholds:
-            rows.append(
-                {
-                    "Threshold": int(threshold),
-                    "TrueNegatives": 0,
-                    "FalsePositives": 0,
-                    "FalseNegatives": 0,
-                    "TruePositives": 0,
-                    "Precision": 0.0,
-                    "Recall": 0.0,
-                    "F1Score": 0.0,
-                    "F2Score": 0.0,
-                    "Accuracy": 0.0,
-                    "BalancedAccuracy": 0.0,
-                    "FalsePositiveRate": 0.0,
-                    "Specificity": 0.0,
-                }
-            )
-        return pd.DataFrame(rows)
 
-    for threshold in thresholds:
-        current_benign = data["PHRED"] <= threshold
+def _round_significant(values: np.ndarray, decimals: np.ndarray) -> np.ndarray:
+    # round to a per-value number of decimals, which is negative for large values
+    up = 10.0 ** np.clip(decimals, 0, None)
+    down = 10.0 ** np.clip(-decimals, 0, None)
+    return np.round(values * up / down) * down / up
 
-        data["binary_prediction"] = np.where(current_benign, "benign", "pathogenic")
 
-        # Defensive handling: if after creating binary arrays they are empty, set metrics to 0
-        y_true = data["binary_truth"]
-        y_pred = data["binary_prediction"]
+def _float32_as_float64(values: np.ndarray) -> np.ndarray:
+    """Widen float32 values to the float64 of their shortest decimal form of 7 to 9 digits.
 
-        if y_true.size == 0 or y_pred.size == 0:
-            tn = fp = fn = tp = 0
-            precision = recall = f1 = f2 = accuracy = balanced_acc = 0.0
-            specificity = fpr = 0.0
-        else:
-            try:
-                tn, fp, fn, tp = confusion_matrix(
-                    y_true, y_pred, labels=["benign", "pathogenic"]
-                ).ravel()
-            except ValueError:
-                tn = fp = fn = tp = 0
-
-            precision = precision_score(
-                y_true, y_pred, pos_label="pathogenic", zero_division=0
-            )
-            recall = recall_score(
-                y_true, y_pred, pos_label="pathogenic", zero_division=0
-            )
-            f1 = f1_score(y_true, y_pred, pos_label="pathogenic", zero_division=0)
-            f2 = (
-                (5 * precision * recall) / (4 * precision + recall)
-                if (precision + recall) > 0
-                else 0
+    Each value gets the fewest significant digits (from 7 up) that still read back as
+    the same float32, so 23.456 stays 23.456 instead of 23.4559993743896.
+    """
+    wide = values.astype(np.float64)
+    pending = np.isfinite(wide) & (wide != 0)
+    magnitude = np.floor(np.log10(np.abs(wide), where=pending, out=np.zeros_like(wide)))
+    for digits in (7, 8, 9):
+        positions = np.flatnonzero(pending)
+        if len(positions) == 0:
+            break
+        rounded = _round_significant(wide[positions], digits - 1 - magnitude[positions])
+        exact = rounded.astype(np.float32) == values[positions]
+        wide[positions[exact]] = rounded[exact]
+        pending[positions[exact]] = False
+    return wide
+
+
+def _widen_float32(df: pd.DataFrame) -> pd.DataFrame:
+    """Return float32 columns as float64 holding the decimal values float32 displays.
+
+    Keeps tables and exports showing e.g. 23.456 instead of 23.4559993743896.
+    """
+    float32_cols = df.columns[df.dtypes == np.float32]
+    if len(float32_cols) == 0:
+        return df
+    return df.assign(
+        **{
+            col: pd.Series(
+                _float32_as_float64(df[col].to_numpy()), index=df.index, name=col
             )
-            accuracy = accuracy_score(y_true, y_pred)
-            balanced_acc = balanced_accuracy_score(y_true, y_pred)
-            specificity = tn / (tn + fp) if (tn + fp) > 0 else 0
-            fpr = fp / (fp + tn) if (fp + tn) > 0 else 0
-
-        rows.append(
-            {
-                "Threshold": int(threshold),
-                "TrueNegatives": int(tn),
-                "FalsePositives": int(fp),
-                "FalseNegatives": int(fn),
-                "TruePositives": int(tp),
-                "Precision": float(precision),
-                "Recall": float(recall),
-                "F1Score": float(f1),
-                "F2Score": float(f2),
-                "Accuracy": float(accuracy),
-                "BalancedAccuracy": float(balanced_acc),
-                "FalsePositiveRate": float(fpr),
-                "Specificity": float(specificity),
-            }
-        )
-
-    result_df = pd.DataFrame(rows)
-    return result_df
+            for col in float32_cols
+        }
+    )
 
 
 def make_data_frame_for_given_genes(
-    df: pd.DataFrame, list_genes, file_genes, radio_buttons_table
+    df: pd.DataFrame, list_genes, file_genes, radio_buttons_table, widen_floats=True
 ):
+    """Return the annotation columns of `df` chosen by `radio_buttons_table`.
+
+    The result holds the chosen columns of `df` without the label columns. With
+    pandas' Copy-on-Write enabled it may share their data with `df`, so callers must
+    not modify it in place. With `widen_floats`, float32 columns are returned as
+    float64 for display (see `_widen_float32`).
+    """
     genes = genes_from_list_or_file(list_genes, file_genes)
 
     if not genes:
@@ -253,6 +192,10 @@ def make_data_frame_for_given_genes(
     if not isinstance(df, pd.DataFrame):
         return pd.DataFrame({"Message": ["No data available"]})
 
+    df = df.drop(columns=LABEL_COLUMNS, errors="ignore")
+    if widen_floats:
+        df = _widen_float32(df)
+
     choice = str(radio_buttons_table or "").lower()
 
     if choice == "clinvar":
@@ -274,7 +217,7 @@ def make_data_frame_for_given_genes(
             "ClinicalSignificance",
         ]
         cols = [c for c in desired if c in df.columns]
-        return df[cols].copy()
+        return df[cols]
     elif choice == "cadd":
         to_drop = [
             "AlleleID",
@@ -289,38 +232,21 @@ def make_data_frame_for_given_genes(
             "VariationID",
             "ClinicalSignificance",
         ]
-        return df.drop(
-            columns=[c for c in to_drop if c in df.columns], errors="ignore"
-        ).copy()
+        return df.drop(columns=[c for c in to_drop if c in df.columns], errors="ignore")
     else:
-        return df.copy()
+        return df
 
 
 def make_data_frame_counting_label_occurences_by_genes(df: pd.DataFrame):
-    data = df
-    data["category"] = data["ClinicalSignificance"].apply(categorize_label)
     grouped = (
-        data.groupby([data["GeneName"], "category"], observed=True)
+        df.groupby([df["GeneName"], label_categories(df)], observed=True)
         .size()
         .unstack(fill_value=0)
     )
     grouped = grouped.loc[grouped.sum(axis=1).sort_values(ascending=False).index]
     grouped = grouped.reset_index()
+    if isinstance(grouped["GeneName"].dtype, pd.CategoricalDtype):
+        # the table's full gene list would otherwise stay attached to every result
+        grouped["GeneName"] = grouped["GeneName"].cat.remove_unused_categories()
 
     return grouped
-
-
-def export_df_to_csv_string(df: pd.DataFrame, index: bool = False) -> str:
-    """Return a CSV string for the provided DataFrame.
-
-    Parameters
-    - df: DataFrame to export
-    - index: whether to include the index in the CSV (default False)
-
-    Returns
-    - CSV content as a str
-    """
-    buf = StringIO()
-    df.to_csv(buf, index=index)
-    buf.seek(0)
-    return buf.getvalue()
@@ -0,0 +1,114 @@
+import hashlib
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+GENE_SEPARATORS = re.compile(r"[;,\s]+")
+
+
+def split_gene_entry(entry) -> list:
+    """Split a GeneName cell such as ``GENE1;GENE2`` into normalized gene symbols."""
+    if entry is None or (not isinstance(entry, str) and pd.isna(entry)):
+        return []
+    return [g.upper() for g in GENE_SEPARATORS.split(str(entry).strip()) if g]
+
+
+def normalize_genes(genes) -> frozenset:
+    """Return the set of normalized (stripped, upper-case) gene symbols."""
+    return frozenset(str(g).strip().upper() for g in genes or [])
+
+
+def gene_set_hash(genes) -> str:
+    """Hash of the normalized gene set; independent of order, case and duplicates."""
+    joined = ";".join(sorted(normalize_genes(genes)))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+class GeneIndex:
+    """Inverted index from normalized gene symbols to the rows of a variant table.
+
+    Rows are grouped by their distinct GeneName entry. An entry naming several genes
+    (e.g. ``GENE1;GENE2``) is reachable from each of them, so filtering for a gene set
+    is a union of the matching entries' row positions.
+    """
+
+    def __init__(self, entry_codes: np.ndarray, entry_names, gene_entries: dict):
+        self.entry_codes = entry_codes
+        self.entry_names = list(entry_names)
+        self.gene_entries = gene_entries
+        # all normalized gene symbols present in the table
+        self.symbols = frozenset(gene_entries)
+
+        # rows sorted by entry; rows without a gene entry (code -1) come first
+        order = np.argsort(entry_codes, kind="stable")
+        n_missing = int(np.count_nonzero(entry_codes < 0))
+        self._rows = order[n_missing:].astype(np.int64)
+        counts = np.bincount(entry_codes[entry_codes >= 0], minlength=len(entry_names))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, column: str = "GeneName") -> "GeneIndex":
+        entries = df[column].astype("category")
+        entry_names = entries.cat.categories
+        gene_entries = {}
+        for code, entry in enumerate(entry_names):
+            for gene in split_gene_entry(entry):
+                gene_entries.setdefault(gene, []).append(code)
+        gene_entries = {
+            gene: np.unique(np.asarray(codes, dtype=np.int32))
+            for gene, codes in gene_entries.items()
+        }
+        return cls(
+            entries.cat.codes.to_numpy().astype(np.int32), entry_names, gene_entries
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index: its arrays, gene symbols and entry names."""
+        return (
+            self.entry_codes.nbytes
+            + self._rows.nbytes
+            + self._offsets.nbytes
+            # one small array per gene, keyed by its symbol (shared with `symbols`)
+            + sys.getsizeof(self.gene_entries)
+            + sum(
+                sys.getsizeof(gene) + sys.getsizeof(codes)
+                for gene, codes in self.gene_entries.items()
+            )
+            + sys.getsizeof(self.symbols)
+            + sys.getsizeof(self.entry_names)
+            + sum(sys.getsizeof(name) for name in self.entry_names)
+        )
+
+    @property
+    def n_entries(self) -> int:
+        return len(self.entry_names)
+
+    def entries(self, genes) -> np.ndarray:
+        """Return the sorted codes of all GeneName entries matching any of `genes`."""
+        matches = [
+            self.gene_entries[gene]
+            for gene in normalize_genes(genes)
+            if gene in self.gene_entries
+        ]
+        if not matches:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(matches))
+
+    def positions(self, genes) -> np.ndarray:
+        """Return the sorted row positions of all variants in any of `genes`."""
+        entries = self.entries(genes)
+        if not len(entries):
+            return np.empty(0, dtype=np.int64)
+        starts, stops = self._offsets[entries], self._offsets[entries + 1]
+        rows = np.concatenate(
+            [self._rows[start:stop] for start, stop in zip(starts, stops)]
+        )
+        rows.sort()
+        return rows
+
+    def take(self, df: pd.DataFrame, genes) -> pd.DataFrame:
+        """Return the rows of `df` (the indexed table) belonging to any of `genes`."""
+        return df.take(self.positions(genes))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# categories in the order plots and tables have always listed them (alphabetical)
+CATEGORIES = ["benign", "likely benign", "likely pathogenic", "pathogenic", "unknown"]
+PATHOGENIC_CATEGORIES = ["pathogenic", "likely pathogenic"]
+
+# identifies `categorize_label` and the binary truth derived from it in cached results;
+# change it whenever either changes
+LABEL_SCHEME = "clinvar-5-categories/pathogenic+likely-pathogenic/1"
+
+# columns attached by the loader; they are not part of the annotation tables
+LABEL_COLUMNS = ["category", "binary_truth"]
+
+
+def categorize_label(label):
+    label_lower = str(label).lower()
+    if (
+        "pathogenic" in label_lower and "likely" not in label_lower
+    ) or "pathogenic/likely risk allele" in label_lower:
+        return "pathogenic"
+    elif "likely pathogenic" in label_lower:
+        return "likely pathogenic"
+    elif "benign" in label_lower and "likely" not in label_lower:
+        return "benign"
+    elif "likely benign" in label_lower:
+        return "likely benign"
+    else:
+        return "unknown"
+
+
+def categorize_labels(labels: pd.Series) -> pd.Series:
+    """Categorize a column of ClinVar labels, running `categorize_label` once per distinct label."""
+    labels = labels.astype("category")
+    # one extra entry so missing labels (code -1) map to 'unknown'
+    lookup = np.array(
+        [CATEGORIES.index(categorize_label(label)) for label in labels.cat.categories]
+        + [CATEGORIES.index("unknown")],
+        dtype=np.int8,
+    )
+    codes = lookup[labels.cat.codes.to_numpy()]
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=CATEGORIES),
+        index=labels.index,
+        name="category",
+    )
+
+
+def add_label_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Attach the categorized label and the binary (pathogenic) ground truth in place."""
+    df["category"] = categorize_labels(df["ClinicalSignificance"])
+    df["binary_truth"] = df["category"].isin(PATHOGENIC_CATEGORIES).to_numpy()
+    return df
+
+
+def label_categories(df: pd.DataFrame) -> pd.Series:
+    """Return the categorized labels of `df`, using the precomputed column if present."""
+    if "category" in df.columns:
+        return df["category"]
+    return categorize_labels(df["ClinicalSignificance"])
+
+
+def binary_truth(df: pd.DataFrame) -> np.ndarray:
+    """Return a boolean array marking (likely) pathogenic variants of `df`."""
+    if "binary_truth" in df.columns:
+        return df["binary_truth"].to_numpy(dtype=bool)
+    return label_categories(df).isin(PATHOGENIC_CATEGORIES).to_numpy()
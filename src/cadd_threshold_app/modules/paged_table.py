@@ -0,0 +1,98 @@
+"""Server-side paging, sorting and filtering of the annotation tables.
+
+The full table stays on the server; filtering and sorting only produce row positions,
+and just the rows of the visible page are taken and sent to the browser."""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = ["25", "50", "100", "250"]
+DEFAULT_PAGE_SIZE = "50"
+
+
+def _text_matches(values: pd.Series, query: str) -> np.ndarray:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # match the distinct categories once, then look up every row's code
+        categories = values.cat.categories.astype(str).str.lower()
+        hits = np.flatnonzero(categories.str.contains(query, regex=False))
+        return np.isin(values.cat.codes.to_numpy(), hits)
+    return (
+        values.astype(str)
+        .str.lower()
+        .str.contains(query, regex=False, na=False)
+        .to_numpy(dtype=bool)
+    )
+
+
+def filter_positions(df: pd.DataFrame, query) -> np.ndarray:
+    """Return the positions of the rows of `df` matching `query`.
+
+    A row matches if a text column contains `query` (ignoring case) or, for a
+    numeric query, a numeric column equals it. An empty query matches all rows.
+    """
+    query = str(query or "").strip().lower()
+    if not query:
+        return np.arange(len(df))
+    try:
+        number = float(query)
+    except ValueError:
+        number = None
+
+    mask = np.zeros(len(df), dtype=bool)
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_bool_dtype(values.dtype):
+            continue
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            if number is not None:
+                mask |= values.to_numpy() == number
+        else:
+            mask |= _text_matches(values, query)
+    return np.flatnonzero(mask)
+
+
+def sort_positions(
+    df: pd.DataFrame, positions: np.ndarray, column, descending=False
+) -> np.ndarray:
+    """Return `positions` ordered by `column` of `df`; missing values go last."""
+    if not column or column not in df.columns:
+        return positions
+    values = df[column].take(positions).reset_index(drop=True)
+    order = values.sort_values(
+        ascending=not descending, kind="stable", na_position="last"
+    ).index.to_numpy()
+    return positions[order]
+
+
+def page_count(n_rows: int, page_size: int) -> int:
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def page_window(df: pd.DataFrame, positions: np.ndarray, page, page_size):
+    """Return the rows of page `page` (1-based, clamped to the valid pages) and its number."""
+    page = min(max(1, int(page or 1)), page_count(len(positions), page_size))
+    start = (page - 1) * page_size
+    stop = start + page_size
+    window = df.take(positions[start:stop])
+    # the grid lists every category of a column; keep only those on the page
+    categorical = [
+        c for c in window.columns if isinstance(window[c].dtype, pd.CategoricalDtype)
+    ]
+    if categorical:
+        window = window.assign(
+            **{c: window[c].cat.remove_unused_categories() for c in categorical}
+        )
+    return window, page
+
+
+def page_summary(page: int, page_size: int, n_matching: int, n_rows: int) -> str:
+    if n_matching == 0:
+        return f"No matching rows ({n_rows} in total)."
+    first = (page - 1) * page_size + 1
+    last = min(page * page_size, n_matching)
+    summary = f"Rows {first}-{last} of {n_matching}"
+    if n_matching != n_rows:
+        summary += f" (filtered from {n_rows})"
+    return f"{summary}, page {page} of {page_count(n_matching, page_size)}."
@@ -0,0 +1,90 @@
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+
+
+def parse_gene_list(gene_list_str) -> list:
+    """Split the Genes cell of a panels summary into normalized gene symbols."""
+    if gene_list_str is None or (
+        not isinstance(gene_list_str, str) and pd.isna(gene_list_str)
+    ):
+        return []
+    return [
+        gene.strip().strip("[]'\"").upper()
+        for gene in re.split(r"[;,]", str(gene_list_str))
+        if gene.strip()
+    ]
+
+
+def _cell_text(value) -> str:
+    """Return a summary cell as text, with an empty or missing cell as ""."""
+    return str(value) if pd.notna(value) else ""
+
+
+class Panel(NamedTuple):
+    name: str
+    panel_id: str
+    version: str
+    genes: tuple
+    gene_set: frozenset
+
+
+class PanelCatalogue:
+    """All gene panels of one panels summary file, looked up by panel name.
+
+    If a name occurs several times, the first row wins.
+    """
+
+    def __init__(self, path: Path, panels):
+        self.path = path
+        self.panels = {}
+        for panel in panels:
+            self.panels.setdefault(panel.name, panel)
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "PanelCatalogue":
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""])
+        panels = []
+        for row in df.to_dict("records"):
+            name = row.get("Name")
+            if not isinstance(name, str):
+                continue
+            genes = tuple(parse_gene_list(row.get("Genes")))
+            panels.append(
+                Panel(
+                    name=name,
+                    panel_id=_cell_text(row.get("PanelID")),
+                    version=_cell_text(row.get("Version")),
+                    genes=genes,
+                    gene_set=frozenset(genes),
+                )
+            )
+        return cls(path, panels)
+
+    def __len__(self) -> int:
+        return len(self.panels)
+
+    def __contains__(self, name) -> bool:
+        return name in self.panels
+
+    def __iter__(self):
+        return iter(self.panels.values())
+
+    @property
+    def names(self) -> list:
+        """Panel names in file order."""
+        return list(self.panels)
+
+    def get(self, name) -> Panel | None:
+        return self.panels.get(name)
+
+    def genes(self, name) -> list:
+        """Return the genes of a panel as listed in the summary ([] if unknown)."""
+        panel = self.panels.get(name)
+        return list(panel.genes) if panel else []
+
+    def gene_set(self, name) -> frozenset:
+        panel = self.panels.get(name)
+        return panel.gene_set if panel else frozenset()
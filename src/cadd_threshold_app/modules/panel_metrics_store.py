@@ -0,0 +1,100 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from .threshold_metrics import METRIC_COLUMNS
+
+# identity of a panel result: it is only reused while all of these are unchanged
+KEY_COLUMNS = ["Combo", "PanelID", "Version", "GeneSetHash", "DatasetFingerprint"]
+STORE_COLUMNS = KEY_COLUMNS + ["Name", "RunDate"] + METRIC_COLUMNS
+CATEGORICAL_COLUMNS = KEY_COLUMNS + ["Name", "RunDate"]
+
+
+def safe_panel_name(panel_name) -> str:
+    """Panel name as used in metrics file names (and as lookup key of the store)."""
+    return re.sub(r"[^0-9A-Za-z._-]", "_", str(panel_name).strip())
+
+
+def combo_name(version) -> str | None:
+    """Map an app version such as ``1.7_GRCh38`` to its combo name ``GRCh38_1.7``."""
+    if isinstance(version, str) and "_" in version:
+        parts = version.split("_")
+        if len(parts) >= 2:
+            return f"{parts[1]}_{parts[0]}"
+    return None
+
+
+def panel_metrics_table(blocks) -> pd.DataFrame:
+    """Concatenate per-panel metric blocks into the store layout.
+
+    Rows are sorted by combo, panel and threshold so every panel of a combo is one
+    contiguous block; the key columns are dictionary encoded.
+    """
+    blocks = [block for block in blocks if len(block)]
+    if not blocks:
+        return pd.DataFrame(columns=STORE_COLUMNS)
+    table = pd.concat([block[STORE_COLUMNS] for block in blocks], ignore_index=True)
+    table = table.astype({column: str for column in CATEGORICAL_COLUMNS})
+    table = table.sort_values(
+        ["Combo", "Name", "Threshold"], kind="stable", ignore_index=True
+    )
+    return table.astype({column: "category" for column in CATEGORICAL_COLUMNS})
+
+
+class PanelMetricsStore:
+    """Precomputed metrics of all gene panels and combos in one long table.
+
+    The table holds one row per combo, panel and threshold (see `STORE_COLUMNS`).
+    Opening the store builds an index from ``(combo, safe panel name)`` to the row
+    range of that panel, so a lookup is a dictionary hit and a slice.
+    """
+
+    def __init__(self, table: pd.DataFrame):
+        self.table = table
+        self._blocks = {}
+        if len(table):
+            groups = table.groupby(["Combo", "Name"], observed=True, sort=False).indices
+            for (combo, name), rows in groups.items():
+                self._blocks[(str(combo), safe_panel_name(name))] = (
+                    int(rows[0]),
+                    int(rows[-1]) + 1,
+                )
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __contains__(self, key) -> bool:
+        combo, panel_name = key
+        return (combo, safe_panel_name(panel_name)) in self._blocks
+
+    def block(self, combo, panel_name) -> pd.DataFrame | None:
+        """Return all stored rows (key columns included) of one panel, or None."""
+        rows = self._blocks.get((combo, safe_panel_name(panel_name)))
+        if rows is None:
+            return None
+        start, stop = rows
+        return self.table.iloc[start:stop]
+
+    def take(self, combo, panel_names) -> pd.DataFrame:
+        """Return the stored rows of several panels of one combo in a single frame."""
+        ranges = [self._blocks[(combo, safe_panel_name(name))] for name in panel_names]
+        rows = np.concatenate(
+            [np.arange(start, stop) for start, stop in ranges]
+            + [np.empty(0, dtype=np.int64)]
+        )
+        return self.table.take(rows)
+
+    def key(self, combo, panel_name) -> tuple | None:
+        """Return the `KEY_COLUMNS` values the stored result of a panel was computed for."""
+        rows = self._blocks.get((combo, safe_panel_name(panel_name)))
+        if rows is None:
+            return None
+        return tuple(str(self.table[column].iat[rows[0]]) for column in KEY_COLUMNS)
+
+    def metrics(self, panel_name, version) -> pd.DataFrame | None:
+        """Return the per-threshold metrics of a panel for an app version, or None."""
+        block = self.block(combo_name(version), panel_name)
+        if block is None:
+            return None
+        return block[METRIC_COLUMNS].reset_index(drop=True)
@@ -1,19 +1,49 @@
-import concurrent.futures
-import multiprocessing
+"""Calculate panel metrics for all panels in the panels summary file and save them to
+the panel metrics store.
+
+All panels of a genome/CADD combo are evaluated at once: the panels' gene sets form a
+sparse panel x gene-entry membership matrix that is multiplied with the per-entry
+threshold bin counts of the combo's `ThresholdCountCube`.
+
+The store records, per combo and panel, the panel version, a hash of its normalized
+gene set and the fingerprint of the variant table used. Panels whose key matches the
+stored one are carried forward instead of being recomputed; without a store, all
+panels are computed."""
+
 import os
 import re
-import zipfile
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from ...data_loader import get_data_path, load_metrics_bar
-from ..functions_server_helpers import calculate_metrics, filtered_data_by_given_genes
+from ...data_loader import (
+    VERSIONS,
+    dataset_fingerprint,
+    get_data_path,
+    load_panel_catalogue,
+    load_panel_metrics_store,
+    load_threshold_cube,
+    write_panel_metrics_store,
+)
+from ..gene_index import gene_set_hash
+from ..panel_metrics_store import (
+    KEY_COLUMNS,
+    STORE_COLUMNS,
+    PanelMetricsStore,
+    panel_metrics_table,
+)
+from ..threshold_metrics import METRIC_COLUMNS, N_BINS, metrics_from_bin_counts
 
-APP_ROOT = Path(__file__).resolve().parents[2]
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
-"""Calculate panel metrics for all panels in the panels summary file and save to CSV files."""
+APP_ROOT = Path(__file__).resolve().parents[2]
 
 
 def get_combo_folder_name(item):
@@ -25,127 +55,181 @@ def get_combo_folder_name(item):
     return re.sub(r"[^0-9A-Za-z._-]", "_", item)
 
 
-def prepare_panel_tasks(panels_df, item, combo_dir):
-    tasks = []
-    for _, row in panels_df.iterrows():
-        panel_name = row.get("Name", "")
-        gene_list_raw = row.get("Genes", "")
-        if pd.isna(gene_list_raw):
+def prepare_panels(catalogue):
+    """Return one row per panel with genes: its identity and parsed genes."""
+    rows = []
+    for panel in catalogue:
+        if not panel.genes:
+            print(f"Skipping '{panel.name}' (no_genes)")
             continue
-        gene_list_str = str(gene_list_raw)
-        tasks.append((panel_name, gene_list_str, item, combo_dir))
-    return tasks
-
-
-def process_panels_for_combo(tasks, run_dir, combo_folder, combo_dir):
-    max_workers = min(4, (multiprocessing.cpu_count() or 1))
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as exc:
-        futures = {exc.submit(process_panel, t): t for t in tasks}
-        for fut in concurrent.futures.as_completed(futures):
-            csv_path, status, msg = fut.result()
-            if status == "written":
-                print(f"Wrote '{csv_path}'")
-            elif status == "skipped":
-                print(f"Skipping '{csv_path}' ({msg})")
-            else:
-                print(f"Failed '{csv_path}': {msg}")
-
-    create_combo_zip(run_dir, combo_folder, combo_dir)
-
-
-def process_panel(task):
-    panel_name, gene_list_str, item_arg, combo_dir_arg = task
-    safe_panel_name = re.sub(r"[^0-9A-Za-z._-]", "_", str(panel_name).strip())
-    csv_filename = f"{safe_panel_name}_metrics.csv"
-    csv_path = os.path.join(combo_dir_arg, csv_filename)
-
-    # skip if already exists
-    if os.path.exists(csv_path):
-        return (csv_path, "skipped", "exists")
-
-    # parse gene list
-    gene_list = [
-        gene.strip().strip("[]'\"").upper()
-        for gene in re.split(r"[;,]", gene_list_str)
-        if gene.strip()
-    ]
-    if not gene_list:
-        return (csv_path, "skipped", "no_genes")
-
-    try:
-        data_local = load_metrics_bar(item_arg)
-        filtered_df = filtered_data_by_given_genes(data_local, gene_list, None)
-        metrics_df = calculate_metrics(filtered_df)
-        metrics_df.to_csv(csv_path, index=False)
-        return (csv_path, "written", None)
-    except Exception as e:
-        return (csv_path, "error", str(e))
-
-
-def create_combo_zip(run_dir, combo_folder, combo_dir):
-    try:
-        if os.path.exists(combo_dir) and any(os.scandir(combo_dir)):
-            zip_path = os.path.join(run_dir, f"{combo_folder}.zip")
-            with zipfile.ZipFile(
-                zip_path, mode="w", compression=zipfile.ZIP_DEFLATED
-            ) as zf:
-                for root, _, files in os.walk(combo_dir):
-                    for fname in files:
-                        full_path = os.path.join(root, fname)
-                        rel_path = os.path.relpath(full_path, combo_dir)
-                        arcname = os.path.join(combo_folder, rel_path)
-                        zf.write(full_path, arcname=arcname)
-            print(f"Created combo ZIP '{zip_path}'")
-        else:
-            print(f"No files to zip for '{combo_dir}'")
-    except Exception as e:
-        print(f"Failed to create combo ZIP for '{combo_dir}': {e}")
+        rows.append(
+            {
+                "PanelID": panel.panel_id,
+                "Name": panel.name,
+                "Version": panel.version,
+                "GeneSetHash": gene_set_hash(panel.gene_set),
+                "Genes": list(panel.genes),
+            }
+        )
+    return pd.DataFrame(
+        rows, columns=["PanelID", "Name", "Version", "GeneSetHash", "Genes"]
+    )
 
 
-candidate_pattern = str(get_data_path() / "paneldata" / "panels_summary_*.csv")
-matches = []
-try:
-    import glob
+def panel_membership(gene_lists, gene_index):
+    """Build the sparse panel x gene-entry membership matrix in CSR form.
+
+    Returns `(indptr, indices)`: the entry codes of panel `i` are
+    `indices[indptr[i]:indptr[i + 1]]`. Panels whose genes are all absent from the
+    data get an empty row.
+    """
+    rows = [gene_index.entries(gene_list) for gene_list in gene_lists]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(r) for r in rows])
+    indices = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    return indptr, indices
+
+
+def panel_bin_counts(entry_counts, indptr, indices):
+    """Sum the entry rows of every panel at once (a CSR matrix product).
+
+    `entry_counts` are the per-entry bin counts of shape `(n_entries, N_BINS, 2)`.
+    Returns an array of shape `(n_panels, N_BINS, 2)`.
+    """
+    n_panels = len(indptr) - 1
+    flat_counts = entry_counts.reshape(entry_counts.shape[0], -1)
+    result = np.zeros((n_panels, flat_counts.shape[1]), dtype=np.int64)
+
+    # reduceat cannot express empty rows, so only reduce panels with entries
+    non_empty = np.diff(indptr) > 0
+    if non_empty.any():
+        result[non_empty] = np.add.reduceat(
+            flat_counts[indices], indptr[:-1][non_empty], axis=0, dtype=np.int64
+        )
+    return result.reshape(n_panels, N_BINS, 2)
+
+
+def peak_rss_mib():
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def combo_panel_metrics(panels, item):
+    """Compute the metrics of the given panels for one combo from its count cube."""
+    cube = load_threshold_cube(item)
+    indptr, indices = panel_membership(panels["Genes"], cube.gene_index)
+    return metrics_from_bin_counts(panel_bin_counts(cube.counts, indptr, indices))
+
+
+def find_panels_summary():
+    catalogue = load_panel_catalogue()
+    if catalogue is None:
+        raise FileNotFoundError(
+            "No panels summary files found matching: "
+            f"{get_data_path() / 'paneldata' / 'panels_summary_*.csv'}"
+        )
+    return catalogue
+
+
+def get_run_version(panels_summary_path):
+    match = re.search(r"(\d{4}-\d{2}-\d{2})", os.path.basename(panels_summary_path))
+    if match:
+        try:
+            parsed = datetime.strptime(match.group(1), "%Y-%m-%d")
+            return parsed.strftime("%Y%m%d")
+        except Exception:
+            pass
+    return datetime.now().strftime("%Y%m%d")
+
+
+def panel_key(panel, combo_folder, fingerprint):
+    entry = dict(panel, Combo=combo_folder, DatasetFingerprint=fingerprint)
+    return tuple(str(entry[column]) for column in KEY_COLUMNS)
+
+
+def split_stale_panels(panels, combo_folder, fingerprint, store):
+    """Return the stored rows of unchanged panels and the panels to recompute."""
+    carried = []
+    stale = []
+    for i, panel in enumerate(panels.to_dict("records")):
+        if store.key(combo_folder, panel["Name"]) == panel_key(
+            panel, combo_folder, fingerprint
+        ):
+            carried.append(panel["Name"])
+        else:
+            stale.append(i)
+    return store.take(combo_folder, carried), len(carried), panels.iloc[stale]
+
+
+def panel_metrics_block(panels, metrics, combo_folder, fingerprint, run_date):
+    """Lay out the `(n_panels, n_thresholds)` metric arrays as store rows."""
+    n_thresholds = metrics["Threshold"].shape[-1]
+    block = {
+        column: np.repeat(panels[column].to_numpy(dtype=str), n_thresholds)
+        for column in ["PanelID", "Version", "GeneSetHash", "Name"]
+    }
+    block.update(Combo=combo_folder, DatasetFingerprint=fingerprint, RunDate=run_date)
+    block.update({column: np.ravel(metrics[column]) for column in METRIC_COLUMNS})
+    return pd.DataFrame(block, columns=STORE_COLUMNS)
+
+
+def main():
+    start = time.perf_counter()
+    catalogue = find_panels_summary()
+    panels = prepare_panels(catalogue)
+    run_date = get_run_version(catalogue.path)
+
+    store = load_panel_metrics_store()
+    if store is None:
+        store = PanelMetricsStore(panel_metrics_table([]))
+
+    blocks = []
+    # each combo is a single pass over its table, so the combos run one after another
+    for item in VERSIONS:
+        combo_folder = get_combo_folder_name(item)
+        fingerprint = dataset_fingerprint(item)
+        carried, n_carried, stale = split_stale_panels(
+            panels, combo_folder, fingerprint, store
+        )
+        blocks.append(carried)
+        print(f"{item}: {n_carried} panels unchanged, {len(stale)} to compute")
+        if stale.empty:
+            continue
 
-    matches = glob.glob(candidate_pattern)
-except Exception:
-    matches = []
+        combo_start = time.perf_counter()
+        try:
+            metrics = combo_panel_metrics(stale, item)
+        except Exception as e:
+            print(f"Failed to process '{item}': {e}")
+            # keep whatever was stored for these panels before
+            blocks.append(
+                store.take(
+                    combo_folder,
+                    [name for name in stale["Name"] if (combo_folder, name) in store],
+                )
+            )
+            continue
+        blocks.append(
+            panel_metrics_block(stale, metrics, combo_folder, fingerprint, run_date)
+        )
+        print(
+            f"{item}: {len(stale)} panels in {time.perf_counter() - combo_start:.1f}s"
+        )
+
+    # the store mirrors the current panels summary; results of removed panels are dropped
+    table = panel_metrics_table(blocks)
+    store_path = write_panel_metrics_store(table)
+    print(
+        f"Wrote panel metrics store '{store_path}' ({len(PanelMetricsStore(table))} panel results)"
+    )
 
-if not matches:
-    raise FileNotFoundError(
-        f"No panels summary files found matching: {candidate_pattern}"
+    print(
+        f"Finished in {time.perf_counter() - start:.1f}s; peak RSS {peak_rss_mib():.0f} MiB"
     )
 
-# pick the most recently modified panels summary file
-panels_summary_path = max(matches, key=os.path.getmtime)
-panels_df = pd.read_csv(panels_summary_path)
-candidate_basename = os.path.basename(panels_summary_path)
-cadd_list = ["1.6_GRCh37", "1.6_GRCh38", "1.7_GRCh37", "1.7_GRCh38"]
-
-match = re.search(r"(\d{4}-\d{2}-\d{2})", candidate_basename)
-if match:
-    try:
-        parsed = datetime.strptime(match.group(1), "%Y-%m-%d")
-        version = parsed.strftime("%Y%m%d")
-    except Exception:
-        version = datetime.now().strftime("%Y%m%d")
-else:
-    version = datetime.now().strftime("%Y%m%d")
-
-# Prepare output directory for this run (dated folder)
-output_dir = str(get_data_path() / "paneldata" / "panel_metrics")
-run_dir = os.path.join(output_dir, version)
-os.makedirs(run_dir, exist_ok=True)
-
-
-# get name for each folder and create the folder
-for item in cadd_list:
-    combo_folder = get_combo_folder_name(item)
-    combo_dir = os.path.join(run_dir, combo_folder)
-    os.makedirs(combo_dir, exist_ok=True)
-
-    tasks = prepare_panel_tasks(panels_df, item, combo_dir)
-    if not tasks:
-        continue
-
-    process_panels_for_combo(tasks, run_dir, combo_folder, combo_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from .labels import CATEGORIES, PATHOGENIC_CATEGORIES, label_categories
+
+# the bar plots bin PHRED scores into [0, 1), [1, 2), ..., [99, 100); wider bins are
+# sums of these
+N_BAR_BINS = 100
+
+
+def bar_bin_index(phred) -> np.ndarray:
+    """Return the 1-wide bar plot bin of every PHRED score, -1 outside [0, 100).
+
+    Matches ``pd.cut(phred, range(0, 101), right=False, include_lowest=True)``, which
+    leaves scores of 100 and missing scores unbinned.
+    """
+    phred = np.asarray(phred, dtype=np.float64)
+    valid = (phred >= 0) & (phred < N_BAR_BINS)
+    return np.where(valid, np.floor(np.where(valid, phred, 0)), -1).astype(np.intp)
+
+
+def bar_bin_labels(steps: int) -> list:
+    return [f"{i}-{i + steps}" for i in range(0, N_BAR_BINS, steps)]
+
+
+class PhredHistogram:
+    """Variant counts per 1-wide PHRED bin and label category.
+
+    `counts` has shape ``(N_BAR_BINS, len(CATEGORIES))``. Bar plots with wider bins
+    or a window of bins are derived by slicing and summing, without touching the
+    variant table again.
+    """
+
+    def __init__(self, counts: np.ndarray):
+        self.counts = counts
+        self.counts.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PhredHistogram":
+        bins = bar_bin_index(df["PHRED"].to_numpy())
+        categories = label_categories(df).cat.codes.to_numpy().astype(np.intp)
+        valid = bins >= 0
+        flat = bins[valid] * len(CATEGORIES) + categories[valid]
+        counts = np.bincount(flat, minlength=N_BAR_BINS * len(CATEGORIES))
+        return cls(counts.reshape(N_BAR_BINS, len(CATEGORIES)).astype(np.int64))
+
+    @property
+    def nbytes(self) -> int:
+        return self.counts.nbytes
+
+    def binned(self, steps: int) -> pd.DataFrame:
+        """Return the counts in bins of `steps` points, labelled ``"0-10"``, ``"10-20"``, ...
+
+        Like a groupby with ``observed=True``, only categories that occur are columns.
+        """
+        if steps < 1 or N_BAR_BINS % steps:
+            raise ValueError(f"Bin width must divide {N_BAR_BINS}, got {steps}")
+        counts = self.counts.reshape(N_BAR_BINS // steps, steps, len(CATEGORIES)).sum(
+            axis=1
+        )
+        grouped = pd.DataFrame(
+            counts,
+            index=pd.CategoricalIndex(
+                bar_bin_labels(steps), ordered=True, name="score_bin"
+            ),
+            columns=pd.CategoricalIndex(CATEGORIES, name="category"),
+        )
+        return grouped.loc[:, self.counts.sum(axis=0) > 0]
+
+
+class ConsequenceHistogram:
+    """Counts of (likely) pathogenic variants per consequence, 1-wide PHRED bin and category.
+
+    `counts` has shape ``(len(consequences), N_BAR_BINS, len(PATHOGENIC_CATEGORIES))``
+    and is read-only. `consequences` lists the consequences of (likely) pathogenic
+    variants in category order, including those whose scores fall outside the bins.
+    """
+
+    def __init__(self, consequences, counts: np.ndarray):
+        self.consequences = list(consequences)
+        self.counts = counts
+        self.counts.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ConsequenceHistogram":
+        categories = label_categories(df)
+        category_index = pd.Series(categories.astype(str).to_numpy()).map(
+            {cat: i for i, cat in enumerate(PATHOGENIC_CATEGORIES)}
+        )
+        is_pathogenic = category_index.notna().to_numpy()
+        consequences = (
+            df["Consequence"][is_pathogenic]
+            .astype("category")
+            .cat.remove_unused_categories()
+        )
+        codes = consequences.cat.codes.to_numpy().astype(np.intp)
+        bins = bar_bin_index(df["PHRED"].to_numpy()[is_pathogenic])
+        cats = category_index.to_numpy()[is_pathogenic].astype(np.intp)
+        valid = (bins >= 0) & (codes >= 0)
+        n_categories = len(PATHOGENIC_CATEGORIES)
+        n_consequences = len(consequences.cat.categories)
+        flat = (codes[valid] * N_BAR_BINS + bins[valid]) * n_categories + cats[valid]
+        counts = np.bincount(flat, minlength=n_consequences * N_BAR_BINS * n_categories)
+        return cls(
+            consequences.cat.categories,
+            counts.reshape(n_consequences, N_BAR_BINS, n_categories).astype(np.int32),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.counts.nbytes
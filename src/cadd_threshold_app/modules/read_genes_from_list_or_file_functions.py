@@ -1,3 +1,5 @@
+from typing import NamedTuple
+
 import pandas as pd
 
 
@@ -9,6 +11,13 @@ class ReadFileError(Exception):
     """Raised when file can not be read or found"""
 
 
+class GeneSelection(NamedTuple):
+    """Canonical gene input: sorted unique genes, or None and the reason why not."""
+
+    genes: tuple | None
+    message: str | None = None
+
+
 def genes_from_list_or_file(list_genes, file_genes):
 
     list_val = list_genes() if callable(list_genes) else list_genes
@@ -17,6 +26,10 @@ def genes_from_list_or_file(list_genes, file_genes):
     if bool(list_val) == bool(file_val):
         return None
 
+    if isinstance(list_val, (list, tuple, set, frozenset)):
+        # already parsed, e.g. a panel's genes or a `GeneSelection`
+        return [str(g).strip().upper() for g in list_val if str(g).strip()]
+
     if list_val:
         return read_genes_from_list_input(list_val)
 
@@ -28,6 +41,31 @@ def genes_from_list_or_file(list_genes, file_genes):
     return genes
 
 
+def select_genes(list_genes, file_genes) -> GeneSelection:
+    """Parse the text field or uploaded file once into a `GeneSelection`.
+
+    Whitespace, order, case and duplicates do not change the result, so it can be
+    compared to decide whether anything downstream needs to be recomputed.
+    """
+    list_val = list_genes() if callable(list_genes) else list_genes
+    file_val = file_genes() if callable(file_genes) else file_genes
+
+    if list_val and file_val:
+        return GeneSelection(
+            None,
+            "You can either put a list in the text field or upload a file, not both.",
+        )
+    if not list_val and not file_val:
+        return GeneSelection(None, "You must input a gene list or upload a file.")
+    try:
+        genes = genes_from_list_or_file(list_val, file_val)
+    except (GeneInputError, ReadFileError) as e:
+        return GeneSelection(None, str(e))
+    if genes is None:
+        return GeneSelection(None, "Something went wrong while processing your input.")
+    return GeneSelection(tuple(sorted(set(genes))))
+
+
 def read_genes_from_list_input(text):
     if text is None:
         return []
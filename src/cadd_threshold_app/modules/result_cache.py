@@ -0,0 +1,85 @@
+import hashlib
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .atomic_file import atomic_write
+from .dataset_cache import DatasetCache
+from .gene_index import gene_set_hash
+from .labels import LABEL_SCHEME
+
+
+class GeneSetResultCache:
+    """Process-wide cache of tables derived from the variants of a gene set.
+
+    Results are addressed by their content: the kind of result, the version, the
+    fingerprint of that version's variant table, the hash of the normalized gene set
+    and `LABEL_SCHEME`. Equal gene sets therefore share one entry no matter which
+    session, gene order or panel produced them.
+
+    The memory tier is a `DatasetCache` with LRU eviction. With a `directory`, results
+    are also written there as Feather files and survive restarts; stale files are
+    never read again because the data fingerprint is part of their name.
+    """
+
+    def __init__(self, max_bytes: int | None = None, directory=None, fingerprint=None):
+        self.memory = DatasetCache(max_bytes)
+        self.directory = Path(directory) if directory else None
+        self.fingerprint = fingerprint or (lambda version: "")
+        self.disk_hits = 0
+        self.disk_writes = 0
+
+    def key(self, kind, version, genes) -> tuple:
+        return (
+            kind,
+            (version, self.fingerprint(version), gene_set_hash(genes), LABEL_SCHEME),
+        )
+
+    def get(self, kind, version, genes, compute):
+        """Return the cached result, calling `compute()` only if no tier holds it.
+
+        The returned DataFrame is shared; callers must not modify it.
+        """
+        key = self.key(kind, version, genes)
+        return self.memory.get(key, lambda: self._load(key, compute))
+
+    def path(self, key) -> Path:
+        kind, args = key
+        digest = hashlib.sha256("\0".join([kind, *args]).encode("utf-8")).hexdigest()
+        return self.directory / f"{kind}-{digest[:32]}.feather"
+
+    def _load(self, key, compute):
+        if self.directory is None:
+            return compute()
+
+        path = self.path(key)
+        try:
+            df = feather.read_feather(path)
+            self.disk_hits += 1
+            return df
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, pa.ArrowException) as e:
+            print(f"Warning: failed to read cached result {path}: {e}")
+
+        df = compute()
+        try:
+            self._write(path, df)
+        except (OSError, ValueError, pa.ArrowException) as e:
+            print(f"Warning: could not write cached result {path}: {e}")
+        return df
+
+    def _write(self, path: Path, df) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, lambda tmp: feather.write_feather(df, tmp))
+        self.disk_writes += 1
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        stats.update(
+            directory=str(self.directory) if self.directory else None,
+            disk_hits=self.disk_hits,
+            disk_writes=self.disk_writes,
+        )
+        return stats
@@ -0,0 +1,150 @@
+"""Streaming exports of tables as CSV, gzip-compressed CSV, Parquet or Feather.
+
+Every writer yields the download chunk by chunk, so the whole file is never held in
+memory. Parquet and Feather keep the dtypes of the table, categoricals included."""
+
+import io
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# rows formatted at a time when streaming a CSV export
+CSV_EXPORT_CHUNK_ROWS = 10_000
+# rows per record batch (Feather) / row group (Parquet)
+ARROW_EXPORT_CHUNK_ROWS = 65_536
+
+# format -> (file extension, media type)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "feather": ("feather", "application/vnd.apache.arrow.file"),
+}
+EXPORT_FORMAT_CHOICES = {
+    "csv": "CSV",
+    "csv.gz": "CSV, gzip-compressed",
+    "parquet": "Parquet",
+    "feather": "Feather (Arrow IPC)",
+}
+BINARY_FORMATS = ("parquet", "feather")
+
+
+def export_filename(stem, fmt) -> str:
+    return f"{stem}.{EXPORT_FORMATS.get(fmt, EXPORT_FORMATS['csv'])[0]}"
+
+
+def export_media_type(fmt) -> str:
+    return EXPORT_FORMATS.get(fmt, EXPORT_FORMATS["csv"])[1]
+
+
+def iter_csv_chunks(
+    df: pd.DataFrame, chunk_rows: int = CSV_EXPORT_CHUNK_ROWS, index: bool = False
+):
+    """Yield the CSV text of `df` in chunks of `chunk_rows` rows, starting with the header.
+
+    Only one chunk is formatted at a time, so memory stays flat however large
+    `df` is.
+    """
+    yield df.iloc[:0].to_csv(index=index)
+    for start in range(0, len(df), chunk_rows):
+        stop = start + chunk_rows
+        yield df.iloc[start:stop].to_csv(index=index, header=False)
+
+
+def gzip_chunks(chunks, encoding: str = "utf-8"):
+    """Gzip-compress a stream of text chunks, yielding the compressed bytes."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(encoding))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what an Arrow writer writes until it is drained."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _record_batches(df: pd.DataFrame, chunk_rows: int):
+    # drop categories not used by the rows, e.g. the other genes of the full table
+    categorical = [
+        c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)
+    ]
+    if categorical:
+        df = df.assign(**{c: df[c].cat.remove_unused_categories() for c in categorical})
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+
+    def batches():
+        for start in range(0, len(df), chunk_rows):
+            stop = start + chunk_rows
+            yield pa.RecordBatch.from_pandas(
+                df.iloc[start:stop], schema=schema, preserve_index=False
+            )
+
+    return schema, batches()
+
+
+def _iter_arrow_chunks(df, open_writer, write, chunk_rows):
+    sink = _ChunkSink()
+    schema, batches = _record_batches(df, chunk_rows)
+    writer = open_writer(pa.PythonFile(sink, mode="w"), schema)
+    for batch in batches:
+        write(writer, batch)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def iter_parquet_chunks(df: pd.DataFrame, chunk_rows: int = ARROW_EXPORT_CHUNK_ROWS):
+    """Yield a Parquet file of `df`, written one row group of `chunk_rows` rows at a time."""
+    return _iter_arrow_chunks(
+        df,
+        pq.ParquetWriter,
+        lambda writer, batch: writer.write_batch(batch, row_group_size=chunk_rows),
+        chunk_rows,
+    )
+
+
+def iter_feather_chunks(df: pd.DataFrame, chunk_rows: int = ARROW_EXPORT_CHUNK_ROWS):
+    """Yield a Feather (Arrow IPC file) of `df`, written one record batch at a time."""
+    return _iter_arrow_chunks(
+        df,
+        pa.ipc.new_file,
+        lambda writer, batch: writer.write_batch(batch),
+        chunk_rows,
+    )
+
+
+def iter_export_chunks(df: pd.DataFrame, fmt):
+    """Yield the download of `df` in the export format `fmt` (see `EXPORT_FORMATS`)."""
+    if fmt == "parquet":
+        return iter_parquet_chunks(df)
+    if fmt == "feather":
+        return iter_feather_chunks(df)
+    chunks = iter_csv_chunks(df, index=False)
+    return gzip_chunks(chunks) if fmt == "csv.gz" else chunks
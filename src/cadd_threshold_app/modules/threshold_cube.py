@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from .gene_index import GeneIndex
+from .labels import binary_truth
+from .threshold_metrics import N_BINS, metrics_frame_from_bin_counts, phred_bin_index
+
+
+def entry_bin_counts(entry_codes, phred, is_pathogenic, n_entries) -> np.ndarray:
+    """Count benign/pathogenic variants per gene entry and threshold bin.
+
+    Rows without a gene entry (code -1) are ignored. Returns an int32 array of shape
+    ``(n_entries, N_BINS, 2)``.
+    """
+    entry_codes = np.asarray(entry_codes)
+    has_entry = entry_codes >= 0
+    bins = phred_bin_index(np.asarray(phred)[has_entry])
+    truth = np.asarray(is_pathogenic, dtype=bool)[has_entry]
+    flat = (entry_codes[has_entry].astype(np.int64) * N_BINS + bins) * 2 + truth
+    counts = np.bincount(flat, minlength=n_entries * N_BINS * 2)
+    return counts.reshape(n_entries, N_BINS, 2).astype(np.int32)
+
+
+class ThresholdCountCube:
+    """Benign/pathogenic variant counts per gene entry and PHRED threshold bin.
+
+    `counts` has shape ``(n_entries, N_BINS, 2)``, one row per distinct GeneName entry
+    of the `GeneIndex`. Since the confusion matrix of a gene set at every threshold
+    only depends on these counts, metrics for any gene list are a sum over the
+    matching entries followed by a cumulative sum. Summing entries instead of genes
+    counts variants of multi-gene entries exactly once.
+    """
+
+    def __init__(self, gene_index: GeneIndex, counts: np.ndarray):
+        self.gene_index = gene_index
+        self.counts = counts
+        self.counts.flags.writeable = False
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, gene_index: GeneIndex
+    ) -> "ThresholdCountCube":
+        counts = entry_bin_counts(
+            gene_index.entry_codes,
+            df["PHRED"].to_numpy(),
+            binary_truth(df),
+            gene_index.n_entries,
+        )
+        return cls(gene_index, counts)
+
+    @property
+    def nbytes(self) -> int:
+        return self.counts.nbytes
+
+    def bin_counts(self, genes) -> np.ndarray:
+        """Return the ``(N_BINS, 2)`` bin counts of all variants in any of `genes`."""
+        entries = self.gene_index.entries(genes)
+        return self.counts[entries].sum(axis=0, dtype=np.int64)
+
+    def metrics(self, genes) -> pd.DataFrame:
+        """Return the per-threshold metrics table for the variants in `genes`."""
+        return metrics_frame_from_bin_counts(self.bin_counts(genes))
@@ -0,0 +1,132 @@
+"""Vectorized confusion-matrix metrics for all PHRED score thresholds at once.
+
+A variant is predicted benign at threshold ``t`` when ``PHRED <= t``. Instead of
+re-classifying every variant for every threshold, the scores are binned once
+between consecutive thresholds and the confusion matrices for all thresholds are
+derived from cumulative bin counts.
+"""
+
+import numpy as np
+import pandas as pd
+
+THRESHOLDS = np.arange(1, 100, step=1)
+
+# bin i holds THRESHOLDS[i - 1] < PHRED <= THRESHOLDS[i]; the last bin collects
+# scores above the highest threshold and missing scores (never predicted benign)
+N_BINS = len(THRESHOLDS) + 1
+
+BENIGN = 0
+PATHOGENIC = 1
+
+METRIC_COLUMNS = [
+    "Threshold",
+    "TrueNegatives",
+    "FalsePositives",
+    "FalseNegatives",
+    "TruePositives",
+    "Precision",
+    "Recall",
+    "F1Score",
+    "F2Score",
+    "Accuracy",
+    "BalancedAccuracy",
+    "FalsePositiveRate",
+    "Specificity",
+]
+
+# metrics offered in the UI with their labels, in the order plots list them
+METRIC_CHOICES = {
+    "FalsePositives": "False Positives",
+    "TruePositives": "True Positives",
+    "FalseNegatives": "False Negatives",
+    "TrueNegatives": "True Negatives",
+    "Recall": "Recall",
+    "Specificity": "Specificity",
+    "FalsePositiveRate": "False Positive Rate",
+    "Precision": "Precision",
+    "F1Score": "F1 Score",
+    "F2Score": "F2 Score",
+    "Accuracy": "Accuracy",
+    "BalancedAccuracy": "Balanced Accuracy",
+}
+
+
+def phred_bin_index(phred) -> np.ndarray:
+    """Return the threshold bin index for every PHRED score."""
+    return np.searchsorted(THRESHOLDS, np.asarray(phred, dtype=np.float64), side="left")
+
+
+def bin_counts(phred, is_pathogenic) -> np.ndarray:
+    """Count benign and pathogenic variants per threshold bin.
+
+    Returns an int64 array of shape ``(N_BINS, 2)`` indexed by ``[bin, BENIGN/PATHOGENIC]``.
+    """
+    bins = phred_bin_index(phred)
+    truth = np.asarray(is_pathogenic, dtype=bool).astype(np.intp)
+    counts = np.bincount(bins * 2 + truth, minlength=N_BINS * 2)
+    return counts.reshape(N_BINS, 2).astype(np.int64)
+
+
+def _safe_divide(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def metrics_from_bin_counts(counts) -> dict:
+    """Derive confusion matrices and metrics for every threshold from bin counts.
+
+    ``counts`` has shape ``(..., N_BINS, 2)``; any leading dimensions (e.g. one row
+    per gene panel) are kept, so many datasets can be evaluated in one call. Returns
+    a dict mapping each column of ``METRIC_COLUMNS`` to an array of shape
+    ``(..., len(THRESHOLDS))``. Zero divisions yield 0, matching scikit-learn's
+    ``zero_division=0`` behaviour.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    below = np.cumsum(counts, axis=-2)[..., : len(THRESHOLDS), :]
+    totals = counts.sum(axis=-2)[..., np.newaxis, :]
+
+    tn = below[..., BENIGN]
+    fn = below[..., PATHOGENIC]
+    fp = totals[..., BENIGN] - tn
+    tp = totals[..., PATHOGENIC] - fn
+
+    precision = _safe_divide(tp, tp + fp)
+    recall = _safe_divide(tp, tp + fn)
+    f1 = _safe_divide(2 * tp, 2 * tp + fp + fn)
+    f2 = _safe_divide(5 * precision * recall, 4 * precision + recall)
+    accuracy = _safe_divide(tp + tn, tp + tn + fp + fn)
+    specificity = _safe_divide(tn, tn + fp)
+    fpr = _safe_divide(fp, fp + tn)
+
+    # balanced accuracy averages the recall of the classes present in the ground truth
+    has_benign = (tn + fp) > 0
+    has_pathogenic = (tp + fn) > 0
+    balanced_acc = _safe_divide(
+        specificity * has_benign + recall * has_pathogenic,
+        has_benign.astype(np.int64) + has_pathogenic,
+    )
+
+    return {
+        "Threshold": np.broadcast_to(THRESHOLDS, tn.shape).astype(np.int64),
+        "TrueNegatives": tn,
+        "FalsePositives": fp,
+        "FalseNegatives": fn,
+        "TruePositives": tp,
+        "Precision": precision,
+        "Recall": recall,
+        "F1Score": f1,
+        "F2Score": f2,
+        "Accuracy": accuracy,
+        "BalancedAccuracy": balanced_acc,
+        "FalsePositiveRate": fpr,
+        "Specificity": specificity,
+    }
+
+
+def metrics_frame_from_bin_counts(counts) -> pd.DataFrame:
+    """Return the per-threshold metrics table for a single ``(N_BINS, 2)`` count array."""
+    metrics = metrics_from_bin_counts(counts)
+    return pd.DataFrame({column: metrics[column] for column in METRIC_COLUMNS})
@@ -0,0 +1,60 @@
+"""Worker pool for heavy renders, so they do not block the session event loop.
+
+`CADD_THRESHOLD_RENDER_POOL` selects a `thread` (default) or `process` pool and
+`CADD_THRESHOLD_RENDER_WORKERS` its size (default: number of cores). Threads share the
+process-wide dataset cache; processes each load the datasets they need but do not
+contend for the GIL. Functions run in a process pool must be importable module-level
+functions taking picklable arguments."""
+
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import threading
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def render_workers() -> int:
+    try:
+        return max(1, int(os.getenv("CADD_THRESHOLD_RENDER_WORKERS", "")))
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def render_pool_kind() -> str:
+    kind = os.getenv("CADD_THRESHOLD_RENDER_POOL", "thread").strip().lower()
+    if kind not in ("thread", "process"):
+        print(f"Warning: unknown CADD_THRESHOLD_RENDER_POOL={kind!r}, using threads")
+        return "thread"
+    return kind
+
+
+def get_executor() -> concurrent.futures.Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if render_pool_kind() == "process":
+                _executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=render_workers(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=render_workers(),
+                    thread_name_prefix="cadd-threshold-render",
+                )
+        return _executor
+
+
+async def run_in_pool(func, *args):
+    """Run `func(*args)` in the render pool and await its result.
+
+    Cancelling the awaiting task (e.g. `ExtendedTask.cancel()`) removes the job from the
+    pool's queue if it has not started yet. A started job cannot be interrupted: it
+    keeps its worker until it finishes and its result is discarded.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
@@ -1,26 +1,73 @@
+import asyncio
+import time
 from pathlib import Path
 
 import starlette.responses
 from shiny import reactive, render, ui
 from shinywidgets import render_widget
 
-from .data_loader import load_metrics, load_metrics_bar, load_panel_metrics_from_zip
-from .modules.basic_bar_plot import make_basic_bar_plot
-from .modules.basic_bar_plot_by_consequence import make_basic_bar_plot_by_consequence
+from .data_loader import (
+    VERSIONS,
+    figure_cache,
+    gene_availability,
+    load_consequence_histogram,
+    load_gene_index,
+    load_gene_universe,
+    load_metrics,
+    load_metrics_bar,
+    load_panel_metrics,
+    load_phred_histogram,
+)
+from .modules.basic_bar_plot import (
+    DEFAULT_TOP_GENES,
+    make_basic_bar_plot_from_histogram,
+    make_gene_bar_plot,
+)
+from .modules.basic_bar_plot_by_consequence import (
+    make_basic_bar_plot_by_consequence_from_histogram,
+)
 from .modules.basic_plot import make_basic_plot
 from .modules.compare_basic_plot import make_compare_basic_plot
+from .modules.figure_cache import figure_widget
 from .modules.functions_server_helpers import (
-    calculate_metrics,
-    export_df_to_csv_string,
+    describe_gene_availability,
     filtered_data_by_given_genes,
     find_missing_genes,
+    gene_set_label_counts,
+    gene_set_metrics,
     get_column_as_gene_list,
-    make_data_frame_counting_label_occurences_by_genes,
     make_data_frame_for_given_genes,
 )
+from .modules.paged_table import (
+    DEFAULT_PAGE_SIZE,
+    filter_positions,
+    page_summary,
+    page_window,
+    sort_positions,
+)
+from .modules.panel_metrics_store import safe_panel_name
+from .modules.read_genes_from_list_or_file_functions import (
+    GeneSelection,
+    genes_from_list_or_file,
+    select_genes,
+)
+from .modules.table_export import (
+    BINARY_FORMATS,
+    export_filename,
+    export_media_type,
+    iter_export_chunks,
+)
+from .modules.threshold_metrics import METRIC_CHOICES
+from .render_pool import run_in_pool
 
 APP_ROOT = Path(__file__).resolve().parents[0]
 
+# x-axis range of the line charts before a slider narrows it
+FULL_X_RANGE = [1, 100]
+
+# quiet period after the last edit of the gene text field before the genes are parsed
+GENE_INPUT_DEBOUNCE_SECONDS = 0.5
+
 
 def _setup_health_check(output, render, ui, session):
     @output
@@ -70,66 +117,140 @@ def _setup_health_check(output, render, ui, session):
             """)
 
 
+# ---------------------------------------------------------------------------------------------------
+# Figures of pages 2 and 3; they only depend on their arguments, so they are cached for all
+# sessions as JSON (see `figure_widget`) and pre-built by the warm-up
+# ---------------------------------------------------------------------------------------------------
+@figure_cache.memoize("metrics")
+def metrics_figure(version, metrics, x_range):
+    return make_basic_plot(
+        load_metrics(version),
+        metrics,
+        x_range,
+        "Metrics at different CADD PHRED score thresholds",
+        "Metric Value",
+        "PHRED Score Threshold",
+        "Metrics",
+    )
+
+
+@figure_cache.memoize("bar")
+def bar_figure(version):
+    return make_basic_bar_plot_from_histogram(
+        load_phred_histogram(version),
+        10,
+        "Distribution of ClinVar variants from threshold 0 to 100 in steps of 10",
+        "PHRED Score",
+        "Number of variants",
+        "Clinical Classification from ClinVar",
+        [-1, 11],
+    )
+
+
+@figure_cache.memoize("bar_small")
+def bar_figure_smaller(version, x_range):
+    # the slider only moves the visible axis range over the precomputed 1-wide bins
+    min_val, max_val = x_range
+    return make_basic_bar_plot_from_histogram(
+        load_phred_histogram(version),
+        1,
+        f"Distribution of ClinVar variants from threshold {min_val} to {max_val} in steps of 1",
+        "PHRED Score",
+        "Number of variants",
+        "Clinical Classification from ClinVar",
+        [min_val - 1, max_val],
+    )
+
+
+@figure_cache.memoize("consequence")
+def consequence_figure(version):
+    return make_basic_bar_plot_by_consequence_from_histogram(
+        load_consequence_histogram(version)
+    )
+
+
+@figure_cache.memoize("compare")
+def compare_figure(metric, versions, x_range):
+    return make_compare_basic_plot(metric, versions, x_range)
+
+
+# The line charts of pages 2 and 3 hold a trace for every metric/version over the full range.
+# Each session keeps its FigureWidget and only toggles trace visibility and moves the x-axis
+# range when the checkboxes and sliders change, instead of sending a new figure.
+def all_metrics_figure(version):
+    return metrics_figure(version, list(METRIC_CHOICES), FULL_X_RANGE)
+
+
+def all_versions_figure(metric):
+    return compare_figure(metric, VERSIONS, FULL_X_RANGE)
+
+
+def show_traces(widget, names) -> None:
+    """Show the traces of `widget` named in `names` and hide the others."""
+    names = set(names or ())
+    widget.plotly_restyle({"visible": [trace.name in names for trace in widget.data]})
+
+
+def set_x_range(widget, x_range) -> None:
+    widget.layout.xaxis.range = list(x_range)
+
+
+def _setup_plot_updates(reactive, plot, visible, x_range):
+    """Apply changes of the `visible` trace names and of `x_range` to the widget of `plot`."""
+
+    @reactive.effect
+    @reactive.event(visible, ignore_init=True)
+    def _show_traces():
+        if plot.widget is not None:
+            show_traces(plot.widget, visible())
+
+    @reactive.effect
+    @reactive.event(x_range, ignore_init=True)
+    def _set_x_range():
+        if plot.widget is not None:
+            set_x_range(plot.widget, x_range())
+
+
 def _setup_page2_metrics(input, render_widget, reactive, render):
     # ---------------------------------------------------------------------------------------------------
     # Page 2 - Comparing Metrics
     # ---------------------------------------------------------------------------------------------------
 
     @render_widget
-    @reactive.event(input.select, input.checkbox_group, input.slider)
+    @reactive.event(input.select)
     def basic_plot():
-        df = load_metrics(input.select())
-        fig = make_basic_plot(
-            df,
-            input.checkbox_group(),
-            input.slider(),
-            "Metrics at different CADD PHRED score thresholds",
-            "Metric Value",
-            "PHRED Score Threshold",
-            "Metrics",
-        )
-        return fig
+        widget = figure_widget(all_metrics_figure(input.select()))
+        show_traces(widget, input.checkbox_group())
+        set_x_range(widget, input.slider())
+        return widget
+
+    _setup_plot_updates(reactive, basic_plot, input.checkbox_group, input.slider)
 
     @render_widget
     @reactive.event(input.select)
     def basic_bar_plot():
-        df = load_metrics_bar(input.select())
-        fig = make_basic_bar_plot(
-            df,
-            10,
-            "standard",
-            "Distribution of ClinVar variants from threshold 0 to 100 in steps of 10",
-            "PHRED Score",
-            "Number of variants",
-            "Clinical Classification from ClinVar",
-            [-1, 11],
-        )
-        return fig
+        return figure_widget(bar_figure(input.select()))
 
     @render_widget
     @reactive.event(input.select, input.slider_bar_small)
     def basic_bar_plot_smaller():
-        # TODO: consider extracting the slider-based subsetting logic to a helper.
-        df = load_metrics_bar(input.select())
-        min_val, max_val = input.slider_bar_small()
-        fig = make_basic_bar_plot(
-            df,
-            1,
-            "standard",
-            f"Distribution of ClinVar variants from threshold {min_val} to {max_val} in steps of 1",
-            "PHRED Score",
-            "Number of variants",
-            "Clinical Classification from ClinVar",
-            [min_val - 1, max_val],
+        return figure_widget(
+            bar_figure_smaller(input.select(), input.slider_bar_small())
         )
-        return fig
 
-    @render_widget
+    @reactive.extended_task
+    async def consequence_figure_task(version):
+        return await run_in_pool(consequence_figure, version)
+
+    @reactive.effect
     @reactive.event(input.select)
+    def _start_consequence_figure():
+        consequence_figure_task.cancel()
+        consequence_figure_task.invoke(input.select())
+
+    @render_widget
     def basic_bar_plot_by_consequence():
-        df = load_metrics_bar(input.select())
-        fig = make_basic_bar_plot_by_consequence(df)
-        return fig
+        return figure_widget(consequence_figure_task.result())
 
 
 def _setup_page3_compare(input, render_widget, reactive):
@@ -138,17 +259,19 @@ def _setup_page3_compare(input, render_widget, reactive):
     # ---------------------------------------------------------------------------------------------------
 
     @render_widget
-    @reactive.event(
-        input.select_metric, input.checkbox_group_version_gr, input.slider_xaxis_compare
-    )
+    @reactive.event(input.select_metric)
     def compare_plot():
-        metric = input.select_metric()
-        fig = make_compare_basic_plot(
-            metric,
-            input.checkbox_group_version_gr(),
-            input.slider_xaxis_compare(),
-        )
-        return fig
+        widget = figure_widget(all_versions_figure(input.select_metric()))
+        show_traces(widget, input.checkbox_group_version_gr())
+        set_x_range(widget, input.slider_xaxis_compare())
+        return widget
+
+    _setup_plot_updates(
+        reactive,
+        compare_plot,
+        input.checkbox_group_version_gr,
+        input.slider_xaxis_compare,
+    )
 
 
 def _get_metric_list(df):  # noqa: C901
@@ -161,184 +284,490 @@ def _get_metric_list(df):  # noqa: C901
     return metrics_list
 
 
-def _setup_page4_genes(input, render_widget, reactive, render):
+# ---------------------------------------------------------------------------------------------------
+# Figures of page 4; run in the render pool, so they take plain (picklable) input values
+# ---------------------------------------------------------------------------------------------------
+def genes_metrics_figure(version, list_genes, file_genes):
+    df = gene_set_metrics(version, genes_from_list_or_file(list_genes, file_genes))
+    metrics_list = _get_metric_list(df)
+    return make_basic_plot(
+        df,
+        metrics_list,
+        [0, 100],
+        "Metrics at different CADD PHRED score thresholds for given genes",
+        "Metric Value",
+        "PHRED Score Threshold",
+        "Metrics",
+    )
+
+
+def panel_metrics(panel_name, cadd_ver):
+    # Try to load precomputed metrics (panel metrics store, then legacy zips)
+    df = load_panel_metrics(panel_name, cadd_ver)
+
+    # Fallback: calculate metrics from the per-gene counts if no precomputed file found
+    if df is None:
+        df = gene_set_metrics(cadd_ver, get_column_as_gene_list(panel_name))
+    return df
+
+
+def panel_metrics_figure(panel_name, cadd_ver):
+    df = panel_metrics(panel_name, cadd_ver)
+    metrics_list = _get_metric_list(df)
+    return make_basic_plot(
+        df,
+        metrics_list,
+        [0, 100],
+        "Metrics at different CADD PHRED score thresholds for given gene panel",
+        "Metric Value",
+        "PHRED Score Threshold",
+        "Metrics",
+    )
+
+
+def gene_bar_figure(label_counts, top_n, page):
+    """Bar plot of page `page` of the `top_n` genes of a `gene_set_label_counts` table."""
+    return make_gene_bar_plot(
+        label_counts.set_index("GeneName"),
+        top_n,
+        page,
+        "Distribution of ClinVar variants by gene",
+        "Gene",
+        "Number of variants",
+        "Clinical Classification from ClinVar",
+    )
+
+
+def _setup_gene_selection(input, reactive):
+    # Parses the gene text field / upload into a canonical `GeneSelection` once the user
+    # stopped typing. The value is only replaced when the selection actually changes, so
+    # edits of whitespace, order or case invalidate nothing downstream.
+    selection = reactive.value(select_genes(None, None))
+    deadline = reactive.value(None)
+
+    def apply():
+        with reactive.isolate():
+            new = select_genes(input.list_genes(), input.file_genes())
+            deadline.set(None)
+            if new != selection.get():
+                selection.set(new)
+
+    @reactive.effect
+    def _note_gene_edit():
+        input.list_genes()
+        input.file_genes()
+        with reactive.isolate():
+            deadline.set(time.monotonic() + GENE_INPUT_DEBOUNCE_SECONDS)
+
+    @reactive.effect
+    def _apply_gene_edit():
+        due = deadline()
+        if due is None:
+            return
+        remaining = due - time.monotonic()
+        if remaining > 0:
+            reactive.invalidate_later(remaining)
+            return
+        apply()
+
+    # a click must not act on a selection that is still waiting for the quiet period
+    @reactive.effect(priority=10)
+    @reactive.event(input.action_button_genes)
+    def _apply_gene_edit_on_click():
+        apply()
+
+    return selection
+
+
+def _setup_genes_figures_task(input, reactive, gene_selection):
+    # computes the metrics line plot and the per-gene label counts for the given genes in
+    # the render pool; runs on click and is cancelled when the inputs change. Cancelling
+    # discards the result and drops pool jobs still queued, but a job that already started
+    # runs to completion (see `run_in_pool`); its result only warms the shared caches.
+    @ui.bind_task_button(button_id="action_button_genes")
+    @reactive.extended_task
+    async def genes_figures(version, genes):
+        return await asyncio.gather(
+            run_in_pool(genes_metrics_figure, version, genes, None),
+            run_in_pool(gene_set_label_counts, version, genes),
+        )
+
+    invoked = {}
+
+    def current_args():
+        return (input.select_version_gr_genes(), gene_selection().genes or ())
+
+    @reactive.effect
+    @reactive.event(input.action_button_genes)
+    def _start_genes_figures():
+        genes_figures.cancel()
+        invoked["args"] = current_args()
+        genes_figures.invoke(*invoked["args"])
+
+    @reactive.effect
+    @reactive.event(input.select_version_gr_genes, gene_selection, ignore_init=True)
+    def _cancel_genes_figures():
+        # a click may update the selection right before the task starts
+        if current_args() != invoked.get("args"):
+            genes_figures.cancel()
+
+    return genes_figures
+
+
+def _setup_panel_figures_task(input, reactive):
+    # same as `_setup_genes_figures_task` for the selected gene panel
+    @ui.bind_task_button(button_id="action_button_generate_metrics_for_panels")
+    @reactive.extended_task
+    async def panel_figures(panel_name, cadd_ver):
+        return await asyncio.gather(
+            run_in_pool(panel_metrics_figure, panel_name, cadd_ver),
+            run_in_pool(
+                gene_set_label_counts, cadd_ver, get_column_as_gene_list(panel_name)
+            ),
+        )
+
+    @reactive.effect
+    @reactive.event(input.action_button_generate_metrics_for_panels)
+    def _start_panel_figures():
+        panel_figures.cancel()
+        panel_figures.invoke(
+            input.selectize_a_gene_panel() or "",
+            input.select_version_gr_genes_for_panels() or "",
+        )
+
+    @reactive.effect
+    @reactive.event(
+        input.selectize_a_gene_panel,
+        input.select_version_gr_genes_for_panels,
+        ignore_init=True,
+    )
+    def _cancel_panel_figures():
+        panel_figures.cancel()
+
+    return panel_figures
+
+
+def _setup_exports(
+    input, output, reactive, render, suffix, trigger, stem, annotations, metrics
+):
+    """Download handlers for the annotation table and the threshold metrics of a page.
+
+    Registers `export_button{suffix}` and `export_metrics_button{suffix}`; the format
+    comes from the `export_format{suffix}` input and the annotation table choice from
+    `radio_buttons_table{suffix}`. File names start with `stem()`, which must not
+    build the tables. `annotations(widen_floats)` returns the annotation table,
+    `metrics()` the metrics. Parquet and Feather keep the float32 columns as they are.
+    """
+
+    def export_format():
+        return input[f"export_format{suffix}"]()
+
+    @output(id=f"export_button{suffix}")
+    @render.download(
+        filename=lambda: export_filename(
+            f"{stem()}_{input[f'radio_buttons_table{suffix}']()}_annotations",
+            export_format(),
+        ),
+        media_type=lambda: export_media_type(export_format()),
+    )
+    @reactive.event(trigger)
+    def _annotations():
+        fmt = export_format()
+        yield from iter_export_chunks(annotations(fmt not in BINARY_FORMATS), fmt)
+
+    @output(id=f"export_metrics_button{suffix}")
+    @render.download(
+        filename=lambda: export_filename(f"{stem()}_metrics", export_format()),
+        media_type=lambda: export_media_type(export_format()),
+    )
+    @reactive.event(trigger)
+    def _metrics():
+        yield from iter_export_chunks(metrics(), export_format())
+
+
+def _setup_paged_table(input, output, reactive, render, table_id, table):
+    """Server side of `ui_components.paged_table` for the DataFrame returned by `table`.
+
+    Filtering and sorting only reorder row positions; just the rows of the current
+    page are sent to the browser.
+    """
+
+    def control(name):
+        return input[f"{table_id}_{name}"]
+
+    @reactive.effect
+    def _update_sort_choices():
+        columns = [str(column) for column in table().columns]
+        with reactive.isolate():
+            current = control("sort")()
+        ui.update_select(
+            f"{table_id}_sort",
+            choices={"": "(table order)", **{column: column for column in columns}},
+            selected=current if current in columns else "",
+        )
+
+    @reactive.calc
+    def positions():
+        df = table()
+        rows = filter_positions(df, control("filter")())
+        return sort_positions(df, rows, control("sort")(), control("descending")())
+
+    @reactive.effect
+    @reactive.event(positions, control("page_size"), ignore_init=True)
+    def _back_to_first_page():
+        ui.update_numeric(f"{table_id}_page", value=1)
+
+    @reactive.calc
+    def page():
+        df, rows = table(), positions()
+        page_size = int(control("page_size")() or DEFAULT_PAGE_SIZE)
+        window, number = page_window(df, rows, control("page")(), page_size)
+        return window, page_summary(number, page_size, len(rows), len(df))
+
+    @output(id=table_id)
+    @render.data_frame
+    def _table():
+        return render.DataGrid(page()[0], summary=False)
+
+    @output(id=f"{table_id}_summary")
+    @render.text
+    def _summary():
+        return page()[1]
+
+
+async def describe_missing_genes(version, genes) -> str:
+    """Report which `genes` are missing from `version` and which other versions have them.
+
+    The universe of `version` may need its table loaded, so it is read in the render
+    pool; other versions are only named once their universe is stored (warm-up,
+    build-cache or an earlier load), so rendering never loads their tables.
+    """
+    universe = await run_in_pool(load_gene_universe, version)
+    availability = gene_availability(genes, stored_only=True)
+    availability[version] = availability.index.isin(universe)
+    return find_missing_genes(universe, genes, None) + describe_gene_availability(
+        availability, version
+    )
+
+
+def _setup_gene_bar_plot(
+    input, output, render_widget, reactive, plot_id, trigger, label_counts
+):
+    """Server side of `ui_components.gene_bar_plot` for the table returned by `label_counts`.
+
+    Only the genes of the current page and one bar for all other genes are drawn, so
+    the plot stays small for panels with thousands of genes.
+    """
+
+    def control(name):
+        return input[f"{plot_id}_{name}"]
+
+    @reactive.effect
+    @reactive.event(trigger, control("top_n"), ignore_init=True)
+    def _back_to_first_page():
+        ui.update_numeric(f"{plot_id}_page", value=1)
+
+    @output(id=plot_id)
+    @render_widget
+    def _plot():
+        return gene_bar_figure(
+            label_counts(),
+            int(control("top_n")() or DEFAULT_TOP_GENES),
+            control("page")(),
+        )
+
+
+def _setup_page4_genes(input, output, render_widget, reactive, render):
     # ---------------------------------------------------------------------------------------------------
     # Page 4 Top - Render text for the given files with genes and filter the data by the given genes
     # ---------------------------------------------------------------------------------------------------
 
+    gene_selection = _setup_gene_selection(input, reactive)
+
     @render.text
-    def missing_genes():
-        data = load_metrics_bar(input.select_version_gr_genes())
-        return find_missing_genes(data, input.list_genes, input.file_genes)
+    async def missing_genes():
+        selection: GeneSelection = gene_selection()
+        if selection.genes is None:
+            return selection.message
+        return await describe_missing_genes(
+            input.select_version_gr_genes(), selection.genes
+        )
 
     @reactive.calc
     def filtered_data():
-        data = load_metrics_bar(input.select_version_gr_genes())
-        return filtered_data_by_given_genes(data, input.list_genes, input.file_genes)
+        version = input.select_version_gr_genes()
+        return filtered_data_by_given_genes(
+            load_metrics_bar(version),
+            gene_selection().genes,
+            None,
+            load_gene_index(version),
+        )
 
     # -----------------------------------------------------------------------------------------------------
     # Page 4 - Plots: Linear Plot with all metrics | the whole dataframe | export df to csv|
     # Barplot for number of entries | Table for number of entries
     # -----------------------------------------------------------------------------------------------------
 
+    genes_figures = _setup_genes_figures_task(input, reactive, gene_selection)
+
     @render_widget
-    @reactive.event(input.action_button_genes)
     def basic_plot_genes():
-        df = calculate_metrics(filtered_data())
-        metrics_list = _get_metric_list(df)
-        fig = make_basic_plot(
-            df,
-            metrics_list,
-            [0, 100],
-            "Metrics at different CADD PHRED score thresholds for given genes",
-            "Metric Value",
-            "PHRED Score Threshold",
-            "Metrics",
-        )
-        return fig
+        return genes_figures.result()[0]
 
-    @reactive.Calc
-    def data_frame_raw():
-        df = filtered_data()
+    @reactive.calc
+    @reactive.event(input.action_button_genes, input.radio_buttons_table)
+    def annotation_table():
         return make_data_frame_for_given_genes(
-            df, input.list_genes, input.file_genes, input.radio_buttons_table()
+            filtered_data(), gene_selection().genes, None, input.radio_buttons_table()
         )
 
-    @render.data_frame
-    @reactive.event(input.action_button_genes, input.radio_buttons_table)
-    def data_frame_full():
-        df = data_frame_raw()
-        return render.DataGrid(df)
+    _setup_paged_table(
+        input, output, reactive, render, "data_frame_full", annotation_table
+    )
 
-    @render.download(filename=lambda: f"{input.radio_buttons_table()}_annotations.csv")
-    @reactive.event(input.action_button_genes)
-    def export_button():
-        df = data_frame_raw()
-        csv_text = export_df_to_csv_string(df, index=False)
-        yield csv_text
+    @reactive.calc
+    def export_stem():
+        genes = gene_selection().genes or ()
+        return f"{input.select_version_gr_genes()}_{len(genes)}_genes"
 
-    @render_widget
-    @reactive.event(input.action_button_genes)
-    def basic_bar_plot_by_gene():
-        data = filtered_data()
-        fig = make_basic_bar_plot(
-            data,
-            10,
-            "gene",
-            "Distribution of ClinVar variants by gene",
-            "Gene",
-            "Number of variants",
-            "Clinical Classification from ClinVar",
-            [-1, 11],
+    def annotations_export(widen_floats):
+        return make_data_frame_for_given_genes(
+            filtered_data(),
+            gene_selection().genes,
+            None,
+            input.radio_buttons_table(),
+            widen_floats,
         )
-        return fig
+
+    def metrics_export():
+        return gene_set_metrics(input.select_version_gr_genes(), gene_selection().genes)
+
+    _setup_exports(
+        input,
+        output,
+        reactive,
+        render,
+        "",
+        input.action_button_genes,
+        export_stem,
+        annotations_export,
+        metrics_export,
+    )
+
+    _setup_gene_bar_plot(
+        input,
+        output,
+        render_widget,
+        reactive,
+        "basic_bar_plot_by_gene",
+        input.action_button_genes,
+        lambda: genes_figures.result()[1],
+    )
 
     @render.data_frame
-    @reactive.event(input.action_button_genes)
     def data_frame_together():
-        data = filtered_data()
-        grouped = make_data_frame_counting_label_occurences_by_genes(data)
-        return render.DataGrid(grouped)
+        # the label counts the task computed in the render pool
+        return render.DataGrid(genes_figures.result()[1])
 
 
-def _setup_page4_panels(input, render_widget, reactive, render):
+def _setup_page4_panels(input, output, render_widget, reactive, render):
     # -----------------------------------------------------------------------------------------------------
     # Page 4 Bottom - Render text for the given panel with genes and filter the data by the given genes
     # -----------------------------------------------------------------------------------------------------
     @render.text
-    def missing_genes_panel():
-        data = load_metrics_bar(input.select_version_gr_genes_for_panels())
-        return find_missing_genes(
-            data, get_column_as_gene_list(input.selectize_a_gene_panel()), None
+    async def missing_genes_panel():
+        return await describe_missing_genes(
+            input.select_version_gr_genes_for_panels(),
+            get_column_as_gene_list(input.selectize_a_gene_panel()),
         )
 
     @reactive.calc
     def filtered_data_panel():
-        data = load_metrics_bar(input.select_version_gr_genes_for_panels())
+        version = input.select_version_gr_genes_for_panels()
         return filtered_data_by_given_genes(
-            data, get_column_as_gene_list(input.selectize_a_gene_panel()), None
+            load_metrics_bar(version),
+            get_column_as_gene_list(input.selectize_a_gene_panel()),
+            None,
+            load_gene_index(version),
         )
 
+    panel_figures = _setup_panel_figures_task(input, reactive)
+
     @render_widget
-    @reactive.event(input.action_button_generate_metrics_for_panels)
     def basic_plot_genes_for_panels():
-        panel_name = input.selectize_a_gene_panel() or ""
-        cadd_ver = input.select_version_gr_genes_for_panels() or ""
-
-        # Try to load precomputed metrics from zip (moved to data_loader)
-        df = load_panel_metrics_from_zip(panel_name, cadd_ver)
-
-        # Fallback: calculate metrics from filtered data if no precomputed file found
-        if df is None:
-            df = calculate_metrics(filtered_data_panel())
-
-        metrics_list = _get_metric_list(df)
-        fig = make_basic_plot(
-            df,
-            metrics_list,
-            [0, 100],
-            "Metrics at different CADD PHRED score thresholds for given gene panel",
-            "Metric Value",
-            "PHRED Score Threshold",
-            "Metrics",
+        return panel_figures.result()[0]
+
+    @reactive.calc
+    @reactive.event(
+        input.action_button_generate_metrics_for_panels,
+        input.radio_buttons_table_for_panels,
+    )
+    def annotation_table_for_panels():
+        return make_data_frame_for_given_genes(
+            filtered_data_panel(),
+            get_column_as_gene_list(input.selectize_a_gene_panel()),
+            None,
+            input.radio_buttons_table_for_panels(),
         )
-        return fig
 
-    @reactive.Calc
-    def data_frame_raw_for_panels():
-        df = filtered_data_panel()
+    _setup_paged_table(
+        input,
+        output,
+        reactive,
+        render,
+        "data_frame_full_for_panels",
+        annotation_table_for_panels,
+    )
+
+    @reactive.calc
+    def export_stem():
+        panel_name = safe_panel_name(input.selectize_a_gene_panel())
+        return f"{panel_name}_{input.select_version_gr_genes_for_panels()}"
+
+    def annotations_export(widen_floats):
         return make_data_frame_for_given_genes(
-            df,
+            filtered_data_panel(),
             get_column_as_gene_list(input.selectize_a_gene_panel()),
             None,
             input.radio_buttons_table_for_panels(),
+            widen_floats,
         )
 
-    @render.data_frame
-    @reactive.event(
+    def metrics_export():
+        return panel_metrics(
+            input.selectize_a_gene_panel(), input.select_version_gr_genes_for_panels()
+        )
+
+    _setup_exports(
+        input,
+        output,
+        reactive,
+        render,
+        "_for_panels",
         input.action_button_generate_metrics_for_panels,
-        input.radio_buttons_table_for_panels,
+        export_stem,
+        annotations_export,
+        metrics_export,
     )
-    def data_frame_full_for_panels():
-        df = data_frame_raw_for_panels()
-        return render.DataGrid(df)
 
-    @render.download(
-        filename=lambda: f"{input.radio_buttons_table_for_panels()}_panel_annotations.csv"
+    _setup_gene_bar_plot(
+        input,
+        output,
+        render_widget,
+        reactive,
+        "basic_bar_plot_by_gene_for_panels",
+        input.action_button_generate_metrics_for_panels,
+        lambda: panel_figures.result()[1],
     )
-    @reactive.event(input.action_button_generate_metrics_for_panels)
-    def export_button_for_panels():
-        df = data_frame_raw_for_panels()
-        csv_text = export_df_to_csv_string(df, index=False)
-        yield csv_text
-
-    @render_widget
-    @reactive.event(input.action_button_generate_metrics_for_panels)
-    def basic_bar_plot_by_gene_for_panels():
-        data = filtered_data_panel()
-        fig = make_basic_bar_plot(
-            data,
-            10,
-            "gene",
-            "Distribution of ClinVar variants by gene",
-            "Gene",
-            "Number of variants",
-            "Clinical Classification from ClinVar",
-            [-1, 11],
-        )
-        return fig
 
     @render.data_frame
-    @reactive.event(input.action_button_generate_metrics_for_panels)
     def data_frame_together_for_panels():
-        data = filtered_data_panel()
-        grouped = make_data_frame_counting_label_occurences_by_genes(data)
-        return render.DataGrid(grouped)
+        return render.DataGrid(panel_figures.result()[1])
 
 
 def server(input, output, session):
     _setup_health_check(output, render, ui, session)
     _setup_page2_metrics(input, render_widget, reactive, render)
     _setup_page3_compare(input, render_widget, reactive)
-    _setup_page4_genes(input, render_widget, reactive, render)
-    _setup_page4_panels(input, render_widget, reactive, render)
+    _setup_page4_genes(input, output, render_widget, reactive, render)
+    _setup_page4_panels(input, output, render_widget, reactive, render)
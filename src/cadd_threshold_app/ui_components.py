@@ -1,35 +1,86 @@
-import glob
-import os
 from pathlib import Path
 
-import pandas as pd
 from shiny import ui
 from shinywidgets import output_widget
 
-from .data_loader import get_data_path
+from .data_loader import load_panel_catalogue
+from .modules.basic_bar_plot import DEFAULT_TOP_GENES, TOP_GENE_CHOICES
+from .modules.paged_table import DEFAULT_PAGE_SIZE, PAGE_SIZES
+from .modules.table_export import EXPORT_FORMAT_CHOICES
+from .modules.threshold_metrics import METRIC_CHOICES
 
 APP_ROOT = Path(__file__).resolve().parents[0]
 
 
 def _load_panel_choices():
-    """Find newest panels_summary_*.csv and return dict of panel name choices.
+    """Return dict of panel name choices from the newest panels_summary_*.csv.
 
     Falls back to a small static dict when no file is found or read fails.
     """
     try:
-        pattern = get_data_path() / "paneldata" / "panels_summary_*.csv"
-        matches = glob.glob(str(pattern))
-        if not matches:
+        catalogue = load_panel_catalogue()
+        if not catalogue:
             return {"1A": "Choice 1A", "1B": "Choice 1B", "1C": "Choice 1C"}
-
-        newest = max(matches, key=os.path.getmtime)
-        df = pd.read_csv(newest)
-        names = df["Name"].dropna().astype(str).tolist()
-        return {name: name for name in names}
+        return {name: name for name in catalogue.names}
     except Exception:
         return {"1A": "Choice 1A", "1B": "Choice 1B", "1C": "Choice 1C"}
 
 
+def paged_table(table_id):
+    """Controls and output of a table that is paged, sorted and filtered on the server.
+
+    The server side is set up with `server_logic._setup_paged_table`.
+    """
+    return ui.div(
+        ui.layout_columns(
+            ui.input_text(
+                f"{table_id}_filter",
+                "Filter rows",
+                placeholder="text or number",
+                update_on="blur",
+            ),
+            ui.input_select(f"{table_id}_sort", "Sort by", {"": "(table order)"}),
+            ui.input_checkbox(f"{table_id}_descending", "Descending", False),
+            ui.input_select(
+                f"{table_id}_page_size",
+                "Rows per page",
+                PAGE_SIZES,
+                selected=DEFAULT_PAGE_SIZE,
+            ),
+            ui.input_numeric(f"{table_id}_page", "Page", 1, min=1, step=1),
+        ),
+        ui.output_text(f"{table_id}_summary"),
+        ui.output_data_frame(table_id),
+    )
+
+
+def gene_bar_plot(plot_id):
+    """Genes per page, page and output of a gene bar plot; served by `server_logic._setup_gene_bar_plot`."""
+    return ui.div(
+        ui.layout_columns(
+            ui.input_select(
+                f"{plot_id}_top_n",
+                "Genes per page",
+                TOP_GENE_CHOICES,
+                selected=str(DEFAULT_TOP_GENES),
+            ),
+            ui.input_numeric(f"{plot_id}_page", "Page", 1, min=1, step=1),
+        ),
+        output_widget(plot_id),
+    )
+
+
+def export_controls(suffix):
+    """Export format and download buttons; served by `server_logic._setup_exports`."""
+    return ui.layout_columns(
+        ui.input_select(
+            f"export_format{suffix}", "Export format", EXPORT_FORMAT_CHOICES
+        ),
+        ui.download_button(f"export_button{suffix}", "Export table"),
+        ui.download_button(f"export_metrics_button{suffix}", "Export metrics"),
+    )
+
+
 def get_ui():
     navbar = ui.page_navbar(
         ui.nav_panel("About", layout_zero(), value="about"),
@@ -112,20 +163,7 @@ def layout_one():
             ui.input_checkbox_group(
                 "checkbox_group",
                 "Choose metrics:",
-                {
-                    "FalsePositives": "False Positives",
-                    "TruePositives": "True Positives",
-                    "FalseNegatives": "False Negatives",
-                    "TrueNegatives": "True Negatives",
-                    "Recall": "Recall",
-                    "Specificity": "Specificity",
-                    "FalsePositiveRate": "False Positive Rate",
-                    "Precision": "Precision",
-                    "F1Score": "F1 Score",
-                    "F2Score": "F2 Score",
-                    "Accuracy": "Accuracy",
-                    "BalancedAccuracy": "Balanced Accuracy",
-                },
+                METRIC_CHOICES,
                 selected=[
                     "FalsePositives",
                     "TruePositives",
@@ -178,20 +216,7 @@ def layout_two():
             ui.input_select(
                 "select_metric",
                 "Choose the metric you want to compare:",
-                {
-                    "FalsePositives": "False Positives",
-                    "TruePositives": "True Positives",
-                    "FalseNegatives": "False Negatives",
-                    "TrueNegatives": "True Negatives",
-                    "Recall": "Recall",
-                    "Specificity": "Specificity",
-                    "FalsePositiveRate": "False Positive Rate",
-                    "Precision": "Precision",
-                    "F1Score": "F1 Score",
-                    "F2Score": "F2 Score",
-                    "Accuracy": "Accuracy",
-                    "BalancedAccuracy": "Balanced Accuracy",
-                },
+                METRIC_CHOICES,
             ),
             ui.input_checkbox_group(
                 "checkbox_group_version_gr",
@@ -245,7 +270,7 @@ def layout_three():
                         width="400px",
                     ),
                 ),
-                ui.input_action_button("action_button_genes", "Generate Metrics"),
+                ui.input_task_button("action_button_genes", "Generate Metrics"),
                 ui.output_text("missing_genes"),
             ),
             ui.accordion_panel(
@@ -262,12 +287,12 @@ def layout_three():
                         "allanno": "show all annotations",
                     },
                 ),
-                ui.download_button("export_button", "Export as csv"),
-                ui.output_data_frame("data_frame_full"),
+                export_controls(""),
+                paged_table("data_frame_full"),
             ),
             ui.accordion_panel(
                 "Bar Chart with the used variants/entries",
-                output_widget("basic_bar_plot_by_gene"),
+                gene_bar_plot("basic_bar_plot_by_gene"),
             ),
             ui.accordion_panel(
                 "Table with a conclusion of the used entries from Clinvar",
@@ -307,7 +332,7 @@ def layout_four():
                         _load_panel_choices(),
                     ),
                 ),
-                ui.input_action_button(
+                ui.input_task_button(
                     "action_button_generate_metrics_for_panels", "Generate Metrics"
                 ),
                 ui.output_text("missing_genes_panel"),
@@ -327,12 +352,12 @@ def layout_four():
                         "allanno": "show all annotations",
                     },
                 ),
-                ui.download_button("export_button_for_panels", "Export as csv"),
-                ui.output_data_frame("data_frame_full_for_panels"),
+                export_controls("_for_panels"),
+                paged_table("data_frame_full_for_panels"),
             ),
             ui.accordion_panel(
                 "Bar Chart with the used variants/entries",
-                output_widget("basic_bar_plot_by_gene_for_panels"),
+                gene_bar_plot("basic_bar_plot_by_gene_for_panels"),
             ),
             ui.accordion_panel(
                 "Table with a conclusion of the used entries from Clinvar",
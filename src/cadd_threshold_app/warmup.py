@@ -0,0 +1,140 @@
+"""Opt-in background warm-up of the datasets and default figures.
+
+Enabled by setting `CADD_THRESHOLD_WARMUP=1` (or `cadd-threshold-app --warmup`). While
+it runs, `/ready` answers 503 so a load balancer only routes sessions to workers that
+do not have to load data inside a render function."""
+
+import concurrent.futures
+import os
+import threading
+import time
+
+from .data_loader import (
+    DEFAULT_VERSION,
+    VERSIONS,
+    load_consequence_histogram,
+    load_gene_index,
+    load_gene_universe,
+    load_metrics,
+    load_metrics_bar,
+    load_panel_catalogue,
+    load_panel_metrics_store,
+    load_phred_histogram,
+    load_threshold_cube,
+)
+from .server_logic import (
+    all_metrics_figure,
+    all_versions_figure,
+    bar_figure,
+    bar_figure_smaller,
+    consequence_figure,
+)
+
+# inputs the pages start with (see ui_components)
+DEFAULT_BAR_RANGE = [0, 100]
+DEFAULT_COMPARE_METRIC = "FalsePositives"
+
+
+def warmup_enabled() -> bool:
+    return os.getenv("CADD_THRESHOLD_WARMUP", "").strip().lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+
+def warmup_workers() -> int:
+    try:
+        return max(1, int(os.getenv("CADD_THRESHOLD_WARMUP_WORKERS", "")))
+    except ValueError:
+        return min(len(VERSIONS), os.cpu_count() or 1)
+
+
+def load_version(version):
+    """Load a version's tables, labels, gene index, gene universe and precomputed counts."""
+    load_metrics(version)
+    load_metrics_bar(version)
+    load_gene_index(version)
+    load_gene_universe(version)
+    load_threshold_cube(version)
+    load_phred_histogram(version)
+    load_consequence_histogram(version)
+
+
+def default_figures():
+    """Build the figures a new session renders first."""
+    all_metrics_figure(DEFAULT_VERSION)
+    bar_figure(DEFAULT_VERSION)
+    bar_figure_smaller(DEFAULT_VERSION, DEFAULT_BAR_RANGE)
+    consequence_figure(DEFAULT_VERSION)
+    all_versions_figure(DEFAULT_COMPARE_METRIC)
+
+
+class WarmUp:
+    """Runs the warm-up tasks in a background thread pool and records their outcome."""
+
+    def __init__(self):
+        self.started = False
+        self.done = threading.Event()
+        self.seconds = None
+        self.failed = {}
+
+    @property
+    def ready(self) -> bool:
+        return not self.started or self.done.is_set()
+
+    def tasks(self, versions) -> dict:
+        tasks = {f"version {version}": (load_version, version) for version in versions}
+        tasks["panel catalogue"] = (load_panel_catalogue,)
+        tasks["panel metrics store"] = (load_panel_metrics_store,)
+        return tasks
+
+    def start(self, versions=None, workers=None) -> None:
+        if self.started:
+            return
+        self.started = True
+        threading.Thread(
+            target=self._run,
+            args=(list(versions or VERSIONS), workers or warmup_workers()),
+            name="cadd-threshold-warmup",
+            daemon=True,
+        ).start()
+
+    def _run(self, versions, workers) -> None:
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="cadd-threshold-warmup"
+        ) as pool:
+            futures = {
+                pool.submit(*task): name for name, task in self.tasks(versions).items()
+            }
+            for fut in concurrent.futures.as_completed(futures):
+                self._record(futures[fut], fut)
+        # the figures need the default version, which is loaded by now
+        try:
+            default_figures()
+        except Exception as e:
+            self.failed["default figures"] = str(e)
+
+        self.seconds = time.perf_counter() - start
+        for name, error in self.failed.items():
+            print(f"Warning: warm-up of {name} failed: {error}")
+        print(f"Warm-up finished in {self.seconds:.1f}s")
+        self.done.set()
+
+    def _record(self, name, fut) -> None:
+        try:
+            fut.result()
+        except Exception as e:
+            self.failed[name] = str(e)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup": self.started,
+            "seconds": self.seconds,
+            "failed": dict(self.failed),
+        }
+
+
+warm_up = WarmUp()
@@ -0,0 +1,64 @@
+"""Synthetic variant table and the row-wise computations the fast paths replaced."""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+GENE_ENTRIES = [
+    "BRCA1",
+    "BRCA2",
+    "TP53",
+    "MLH1;MSH2",
+    "MSH2",
+    "ATM,CHEK2",
+    "PTEN APC",
+    None,
+]
+LABELS = [
+    "Pathogenic",
+    "Likely pathogenic",
+    "Pathogenic/Likely pathogenic",
+    "Pathogenic/Likely risk allele",
+    "Benign",
+    "Likely benign",
+    "Benign/Likely benign",
+    "Uncertain significance",
+    "Conflicting classifications of pathogenicity",
+    None,
+]
+GENE_SETS = [
+    ["BRCA1"],
+    ["msh2"],
+    ["MLH1", "TP53"],
+    ["CHEK2", "APC", "BRCA2"],
+    ["NOT_A_GENE"],
+    [],
+]
+
+
+def variant_table(n: int = 2_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    phred = rng.uniform(0, 110, n).round(3)
+    # integer scores sit exactly on a threshold; missing scores are never benign
+    on_threshold = rng.random(n) < 0.1
+    phred[on_threshold] = rng.integers(0, 100, on_threshold.sum())
+    phred[rng.random(n) < 0.02] = np.nan
+    return pd.DataFrame(
+        {
+            "GeneName": rng.choice(np.array(GENE_ENTRIES, dtype=object), n),
+            "PHRED": phred,
+            "ClinicalSignificance": rng.choice(np.array(LABELS, dtype=object), n),
+        }
+    )
+
+
+def rowwise_filter(df: pd.DataFrame, genes) -> pd.DataFrame:
+    """Rows whose GeneName entry names any of `genes`, matched one row at a time."""
+    genes = {gene.strip().upper() for gene in genes}
+
+    def matches(entry) -> bool:
+        entry = "" if pd.isna(entry) else str(entry)
+        return not genes.isdisjoint(g.upper() for g in re.split(r"[;,\s]+", entry) if g)
+
+    return df[df["GeneName"].apply(matches)]
@@ -0,0 +1,7 @@
+import pytest
+from baseline import variant_table
+
+
+@pytest.fixture(scope="session")
+def variants():
+    return variant_table()
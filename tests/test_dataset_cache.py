@@ -0,0 +1,107 @@
+import sys
+import threading
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from cadd_threshold_app.modules.dataset_cache import DatasetCache, sizeof
+from cadd_threshold_app.modules.gene_index import GeneIndex
+
+
+def test_evicts_least_recently_used():
+    cache = DatasetCache(max_bytes=2_000)
+
+    @cache.memoize()
+    def load(name):
+        return np.zeros(100, dtype=np.int64)
+
+    load("a")
+    load("b")
+    load("a")
+    load("c")
+    assert [entry["args"] for entry in cache.stats()["entries"]] == [["a"], ["c"]]
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 3, 1)
+
+
+def test_keeps_pinned_entries():
+    cache = DatasetCache(max_bytes=1_000, pinned=["default"])
+
+    @cache.memoize()
+    def load(version):
+        return np.zeros(100, dtype=np.int64)
+
+    @cache.memoize(pinnable=False)
+    def derived(version):
+        return np.zeros(100, dtype=np.int64)
+
+    load("default")
+    derived("default")
+    load("other")
+    load("newest")
+    entries = cache.stats()["entries"]
+    assert [(entry["args"], entry["pinned"]) for entry in entries] == [
+        (["default"], True),
+        (["newest"], False),
+    ]
+    # the pinned entry and the newest one are kept even over budget
+    assert cache.nbytes > cache.max_bytes
+
+
+def test_concurrent_misses_load_once():
+    cache = DatasetCache()
+    calls = []
+    started = threading.Barrier(4)
+
+    @cache.memoize()
+    def load(version):
+        calls.append(version)
+        return np.zeros(10)
+
+    def worker():
+        started.wait()
+        load("v")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["v"]
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_cache_clear_drops_only_that_function():
+    cache = DatasetCache()
+
+    @cache.memoize()
+    def first(version):
+        return np.zeros(10)
+
+    @cache.memoize()
+    def second(version):
+        return np.zeros(10)
+
+    first("v")
+    second("v")
+    first.cache_clear()
+    assert [entry["function"] for entry in cache.stats()["entries"]] == [
+        second.__qualname__
+    ]
+
+
+def test_sizeof_counts_the_strings_of_gene_universes():
+    genes = frozenset(f"GENE{i}" for i in range(1_000))
+    assert sizeof(genes) > sys.getsizeof(genes) + 1_000 * sys.getsizeof("GENE0")
+
+
+def test_sizeof_gene_index_is_close_to_its_allocations():
+    # many genes with few rows each, so the per-gene symbols and arrays dominate
+    table = pd.DataFrame({"GeneName": [f"GENE{i % 2_000}" for i in range(5_000)]})
+    tracemalloc.start()
+    try:
+        index = GeneIndex.from_frame(table)
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert 0.8 * allocated < sizeof(index) < 1.25 * allocated
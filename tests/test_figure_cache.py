@@ -0,0 +1,53 @@
+import json
+
+import plotly.graph_objects as go
+
+from cadd_threshold_app.modules.figure_cache import FigureCache
+
+
+def test_figures_are_keyed_by_kind_and_inputs():
+    cache = FigureCache()
+    calls = []
+
+    @cache.memoize("bars")
+    def bars(categories, value_range):
+        calls.append((categories, value_range))
+        return go.Figure(go.Bar(x=list(categories), y=list(value_range)))
+
+    first = bars(["Benign", "Pathogenic"], [0, 10])
+    # list inputs from checkbox groups and sliders are frozen into hashable keys
+    assert bars(["Benign", "Pathogenic"], [0, 10]) == first
+    assert bars(("Benign", "Pathogenic"), (0, 10)) == first
+    assert len(calls) == 1
+
+    bars(["Benign"], [0, 10])
+    bars(["Benign", "Pathogenic"], [0, 20])
+    assert len(calls) == 3
+    assert json.loads(first)["data"][0]["x"] == ["Benign", "Pathogenic"]
+    assert cache.stats()["kinds"] == {"bars": {"hits": 2, "misses": 3}}
+
+
+def test_kinds_do_not_share_entries():
+    cache = FigureCache()
+    line = cache.get("line", (1,), lambda: go.Figure(go.Scatter(y=[1])))
+    bar = cache.get("bar", (1,), lambda: go.Figure(go.Bar(y=[1])))
+    assert json.loads(line)["data"][0]["type"] == "scatter"
+    assert json.loads(bar)["data"][0]["type"] == "bar"
+
+
+def test_cache_clear_drops_only_its_kind():
+    cache = FigureCache()
+    built = []
+
+    @cache.memoize("line")
+    def line(n):
+        built.append(n)
+        return go.Figure(go.Scatter(y=[n]))
+
+    cache.get("bar", (1,), lambda: go.Figure(go.Bar(y=[1])))
+    line(1)
+    line.cache_clear()
+    line(1)
+    assert built == [1, 1]
+    assert cache.get("bar", (1,), lambda: None)
+    assert cache.stats()["kinds"]["bar"] == {"hits": 1, "misses": 1}
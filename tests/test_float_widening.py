@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from cadd_threshold_app.modules.functions_server_helpers import (
+    _float32_as_float64,
+    _widen_float32,
+)
+
+
+def test_widened_values_read_back_as_the_same_float32():
+    rng = np.random.default_rng(0)
+    values = np.concatenate(
+        [
+            rng.uniform(-100, 100, 5000),
+            rng.lognormal(0, 20, 5000),
+            [0.0, -0.0, np.inf, -np.inf, np.nan],
+        ]
+    ).astype(np.float32)
+    wide = _float32_as_float64(values)
+    assert wide.dtype == np.float64
+    np.testing.assert_array_equal(wide.astype(np.float32), values)
+
+
+def test_widened_values_use_the_shortest_decimal_form():
+    values = np.array([23.456, 0.1, 1e-7, 12345.678, 3.4028235e38], dtype=np.float32)
+    wide = _float32_as_float64(values)
+    # numpy prints a float32 in the shortest form that reads back as the same float32
+    assert [repr(float(v)) for v in wide] == [repr(float(str(v))) for v in values]
+    assert wide[0] == 23.456
+    assert wide[1] == 0.1
+
+
+def test_widen_float32_only_touches_float32_columns():
+    df = pd.DataFrame(
+        {
+            "PHRED": np.array([23.456, 1.5], dtype=np.float32),
+            "Score": np.array([0.1, 0.2]),
+            "GeneName": ["A", "B"],
+        },
+        index=[10, 20],
+    )
+    wide = _widen_float32(df)
+    assert list(wide.dtypes) == [np.float64, np.float64, df.dtypes["GeneName"]]
+    assert wide["PHRED"].tolist() == [23.456, 1.5]
+    pd.testing.assert_frame_equal(wide.drop(columns="PHRED"), df.drop(columns="PHRED"))
+    assert _widen_float32(df.drop(columns="PHRED")).equals(df.drop(columns="PHRED"))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from baseline import GENE_SETS, rowwise_filter
+
+from cadd_threshold_app.modules.gene_index import (
+    GeneIndex,
+    gene_set_hash,
+    split_gene_entry,
+)
+
+
+@pytest.mark.parametrize("genes", GENE_SETS)
+def test_take_matches_rowwise_filter(variants, genes):
+    index = GeneIndex.from_frame(variants)
+    expected = rowwise_filter(variants, genes)
+    assert list(index.take(variants, genes).index) == list(expected.index)
+
+
+def test_multi_gene_entry_is_reachable_from_each_gene(variants):
+    index = GeneIndex.from_frame(variants)
+    both = index.positions(["MLH1", "MSH2"])
+    assert np.array_equal(
+        both, np.union1d(index.positions(["MLH1"]), index.positions(["MSH2"]))
+    )
+    assert {"ATM", "CHEK2", "PTEN", "APC"} <= index.symbols
+
+
+def test_split_gene_entry():
+    assert split_gene_entry(" mlh1;MSH2, pms2 ") == ["MLH1", "MSH2", "PMS2"]
+    assert split_gene_entry(None) == []
+    assert split_gene_entry(float("nan")) == []
+
+
+def test_gene_set_hash_ignores_order_case_and_duplicates():
+    assert gene_set_hash(["BRCA1", "tp53"]) == gene_set_hash(
+        [" TP53", "brca1", "BRCA1"]
+    )
+    assert gene_set_hash(["BRCA1"]) != gene_set_hash(["BRCA2"])
@@ -0,0 +1,35 @@
+import pytest
+
+from cadd_threshold_app.modules.read_genes_from_list_or_file_functions import (
+    GeneSelection,
+    select_genes,
+)
+
+
+def test_select_genes_ignores_whitespace_order_case_and_duplicates():
+    a = select_genes("BRCA1, tp53\n  brca2 ", None)
+    b = select_genes(["TP53", "brca2", "BRCA1", "brca1", " "], None)
+    c = select_genes(lambda: "'Brca2'\n[TP53]\n\nbrca1,BRCA1", lambda: None)
+    assert a == b == c == GeneSelection(("BRCA1", "BRCA2", "TP53"))
+
+
+def test_select_genes_reads_uploaded_files(tmp_path):
+    path = tmp_path / "genes.tsv"
+    path.write_text("tp53\tx\nBRCA1\ty\nbrca1\tz\n")
+    selection = select_genes(None, [{"datapath": str(path)}])
+    assert selection == select_genes("BRCA1,TP53", None)
+
+
+@pytest.mark.parametrize(
+    "list_val, file_val",
+    [
+        (None, None),
+        ("", []),
+        ("TP53", [{"datapath": "genes.txt"}]),
+        (None, [{"name": "genes.txt"}]),
+    ],
+)
+def test_select_genes_reports_unusable_input(list_val, file_val):
+    selection = select_genes(list_val, file_val)
+    assert selection.genes is None
+    assert selection.message
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+from baseline import variant_table
+
+from cadd_threshold_app import data_loader
+
+
+@pytest.fixture
+def data_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, "get_data_path", lambda: tmp_path)
+    for i, version in enumerate(data_loader.VERSIONS):
+        table = variant_table(n=200, seed=i)
+        table.loc[0, "GeneName"] = f"ONLY_{i}"
+        table.to_csv(data_loader.variant_table_path(version), index=False)
+    data_loader.dataset_cache.clear()
+    yield tmp_path
+    data_loader.dataset_cache.clear()
+
+
+def test_concurrent_stores_keep_every_version(data_path):
+    started = threading.Barrier(len(data_loader.VERSIONS))
+
+    def load(version):
+        started.wait()
+        data_loader.load_gene_universe(version)
+
+    threads = [
+        threading.Thread(target=load, args=(version,))
+        for version in data_loader.VERSIONS
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i, version in enumerate(data_loader.VERSIONS):
+        universe = data_loader.stored_gene_universe(version)
+        assert universe is not None
+        assert f"ONLY_{i}" in universe and "BRCA1" in universe
+
+
+def test_gene_availability_from_stored_universes(data_path):
+    first, second = data_loader.VERSIONS[:2]
+    data_loader.load_gene_universe(first)
+    availability = data_loader.gene_availability(
+        ["only_0", "ONLY_1", "brca1"], stored_only=True
+    )
+    assert list(availability.columns) == [first]
+    assert availability[first].to_dict() == {
+        "BRCA1": True,
+        "ONLY_0": True,
+        "ONLY_1": False,
+    }
+    # a version's universe is only used while its table is unchanged
+    data_loader.variant_table_path(first).write_text("GeneName\nBRCA1\n")
+    assert data_loader.stored_gene_universe(first) is None
+    assert data_loader.stored_gene_universe(second) is None
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from baseline import GENE_SETS, LABELS, rowwise_filter
+
+from cadd_threshold_app.modules.functions_server_helpers import (
+    make_data_frame_counting_label_occurences_by_genes,
+)
+from cadd_threshold_app.modules.gene_index import GeneIndex
+from cadd_threshold_app.modules.labels import (
+    CATEGORIES,
+    add_label_columns,
+    binary_truth,
+    categorize_label,
+    categorize_labels,
+)
+from cadd_threshold_app.modules.threshold_cube import ThresholdCountCube
+
+
+def rowwise_label_counts(df: pd.DataFrame) -> dict:
+    categories = df["ClinicalSignificance"].apply(categorize_label)
+    counts = df.groupby([df["GeneName"], categories]).size()
+    return {(gene, category): count for (gene, category), count in counts.items()}
+
+
+def test_categorize_labels_matches_categorize_label():
+    labels = pd.Series(LABELS * 3, dtype=object)
+    categories = categorize_labels(labels)
+    assert list(categories.cat.categories) == CATEGORIES
+    assert list(categories.astype(str)) == [categorize_label(label) for label in labels]
+
+
+def test_add_label_columns(variants):
+    labelled = add_label_columns(variants.copy())
+    expected = variants["ClinicalSignificance"].apply(categorize_label)
+    assert list(labelled["category"].astype(str)) == list(expected)
+    assert np.array_equal(
+        binary_truth(labelled),
+        expected.isin(["pathogenic", "likely pathogenic"]).to_numpy(),
+    )
+    assert np.array_equal(binary_truth(labelled), binary_truth(variants))
+
+
+def test_labelled_cube_matches_unlabelled(variants):
+    index = GeneIndex.from_frame(variants)
+    labelled = add_label_columns(variants.copy())
+    np.testing.assert_array_equal(
+        ThresholdCountCube.from_frame(labelled, index).counts,
+        ThresholdCountCube.from_frame(variants, index).counts,
+    )
+
+
+@pytest.mark.parametrize("genes", GENE_SETS)
+def test_label_counts_match_rowwise_groupby(variants, genes):
+    labelled = add_label_columns(variants.copy())
+    counts = make_data_frame_counting_label_occurences_by_genes(
+        GeneIndex.from_frame(labelled).take(labelled, genes)
+    )
+    per_category = counts.drop(columns="GeneName")
+    totals = per_category.sum(axis=1)
+    assert list(totals) == sorted(totals, reverse=True)
+    actual = {
+        (gene, str(category)): count
+        for gene, row in zip(counts["GeneName"], per_category.to_dict("records"))
+        for category, count in row.items()
+        if count
+    }
+    assert actual == rowwise_label_counts(rowwise_filter(variants, genes))
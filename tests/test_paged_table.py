@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cadd_threshold_app.modules.paged_table import (
+    filter_positions,
+    page_summary,
+    page_window,
+    sort_positions,
+)
+
+
+@pytest.fixture
+def table():
+    return pd.DataFrame(
+        {
+            "GeneName": pd.Categorical(
+                ["BRCA1", "tp53", "BRCA2", None, "MLH1;MSH2", "BRCA1"],
+                categories=["BRCA1", "BRCA2", "MLH1;MSH2", "tp53", "UNUSED"],
+            ),
+            "PHRED": [12.5, np.nan, 30.0, 7.0, 30.0, 1.0],
+            "Pos": [100, 200, 300, 400, 500, 600],
+            "Note": ["frameshift", None, "Missense", "stop gained", "missense", ""],
+            "binary_truth": [True, False, True, False, True, False],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("", [0, 1, 2, 3, 4, 5]),
+        ("brca", [0, 2, 5]),
+        ("TP53", [1]),
+        ("missense", [2, 4]),
+        ("msh2", [4]),
+        ("30", [2, 4]),
+        ("400", [3]),
+        ("absent", []),
+        ("true", []),
+    ],
+)
+def test_filter_positions(table, query, expected):
+    assert list(filter_positions(table, query)) == expected
+
+
+def test_sort_positions_stable_with_missing_values_last(table):
+    positions = np.arange(len(table))
+    assert list(sort_positions(table, positions, "PHRED")) == [5, 3, 0, 2, 4, 1]
+    assert list(sort_positions(table, positions, "PHRED", descending=True)) == [
+        2,
+        4,
+        0,
+        3,
+        5,
+        1,
+    ]
+    # sorting a filtered subset keeps table positions
+    subset = filter_positions(table, "brca")
+    assert list(sort_positions(table, subset, "Pos", descending=True)) == [5, 2, 0]
+    assert sort_positions(table, subset, "NoSuchColumn") is subset
+
+
+def test_page_window_clamps_the_page_and_drops_unused_categories(table):
+    positions = sort_positions(table, np.arange(len(table)), "Pos")
+    window, page = page_window(table, positions, 2, 4)
+    assert page == 2
+    assert list(window["Pos"]) == [500, 600]
+    assert list(window["GeneName"].cat.categories) == ["BRCA1", "MLH1;MSH2"]
+
+    window, page = page_window(table, positions, 99, 4)
+    assert page == 2
+    window, page = page_window(table, positions, None, 4)
+    assert (page, list(window["Pos"])) == (1, [100, 200, 300, 400])
+    window, page = page_window(table, positions[:0], 3, 4)
+    assert (page, len(window)) == (1, 0)
+
+
+def test_page_summary():
+    assert page_summary(2, 4, 6, 6) == "Rows 5-6 of 6, page 2 of 2."
+    assert page_summary(1, 4, 3, 6) == "Rows 1-3 of 3 (filtered from 6), page 1 of 1."
+    assert page_summary(1, 4, 0, 6) == "No matching rows (6 in total)."
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import pytest
+from baseline import GENE_SETS
+
+import cadd_threshold_app.modules.panelapp.calculate_panel_metrics_and_save as batch
+from cadd_threshold_app.modules.gene_index import GeneIndex
+from cadd_threshold_app.modules.panel_metrics_store import (
+    PanelMetricsStore,
+    combo_name,
+    safe_panel_name,
+)
+from cadd_threshold_app.modules.threshold_cube import ThresholdCountCube
+from cadd_threshold_app.modules.threshold_metrics import METRIC_COLUMNS
+
+
+@pytest.fixture
+def cube(variants, monkeypatch):
+    cube = ThresholdCountCube.from_frame(variants, GeneIndex.from_frame(variants))
+    monkeypatch.setattr(batch, "load_threshold_cube", lambda item: cube)
+    return cube
+
+
+@pytest.fixture
+def panels():
+    return pd.DataFrame(
+        {
+            "PanelID": [str(i) for i in range(len(GENE_SETS))],
+            "Name": [f"Panel {i}" for i in range(len(GENE_SETS))],
+            "Version": ["1.0"] * len(GENE_SETS),
+            "GeneSetHash": [f"hash{i}" for i in range(len(GENE_SETS))],
+            "Genes": GENE_SETS,
+        }
+    )
+
+
+def test_combo_panel_metrics_match_the_gene_set_metrics(cube, panels):
+    metrics = batch.combo_panel_metrics(panels, "1.7_GRCh38")
+    for i, genes in enumerate(panels["Genes"]):
+        expected = cube.metrics(genes)
+        for column in METRIC_COLUMNS:
+            np.testing.assert_array_equal(metrics[column][i], expected[column])
+
+
+def stored(panels, combo="GRCh38_1.7", fingerprint="fp1"):
+    metrics = batch.combo_panel_metrics(panels, combo)
+    return batch.PanelMetricsStore(
+        batch.panel_metrics_table(
+            [batch.panel_metrics_block(panels, metrics, combo, fingerprint, "20260101")]
+        )
+    )
+
+
+def test_split_stale_panels_carries_unchanged_panels(cube, panels):
+    store = stored(panels)
+    changed = panels.copy()
+    changed.loc[1, "Version"] = "2.0"
+    changed.loc[2, "GeneSetHash"] = "other"
+    changed.loc[3, "Name"] = "New panel"
+    carried, n_carried, stale = batch.split_stale_panels(
+        changed, "GRCh38_1.7", "fp1", store
+    )
+    assert n_carried == len(panels) - 3
+    assert list(stale["Name"]) == ["Panel 1", "Panel 2", "New panel"]
+    assert sorted(carried["Name"].astype(str).unique()) == [
+        "Panel 0",
+        "Panel 4",
+        "Panel 5",
+    ]
+
+
+def test_split_stale_panels_recomputes_all_after_a_data_change(cube, panels):
+    store = stored(panels)
+    _, n_carried, stale = batch.split_stale_panels(panels, "GRCh38_1.7", "fp2", store)
+    assert n_carried == 0
+    assert len(stale) == len(panels)
+    # another combo has nothing stored
+    _, n_carried, _ = batch.split_stale_panels(panels, "GRCh37_1.7", "fp1", store)
+    assert n_carried == 0
+
+
+def test_store_lookups(cube, panels, tmp_path):
+    path = tmp_path / "panel_metrics.feather"
+    feather.write_feather(stored(panels).table, path)
+    # the app opens the written file memory-mapped
+    store = PanelMetricsStore(feather.read_table(path, memory_map=True).to_pandas())
+    assert len(store) == len(panels)
+    assert ("GRCh38_1.7", "Panel 3") in store
+    assert ("GRCh37_1.7", "Panel 3") not in store
+
+    metrics = store.metrics("Panel 3", "1.7_GRCh38")
+    pd.testing.assert_frame_equal(
+        metrics, cube.metrics(panels["Genes"][3]), check_dtype=False
+    )
+    assert store.metrics("Panel 3", "1.6_GRCh38") is None
+    assert store.block("GRCh38_1.7", "No such panel") is None
+
+    assert store.key("GRCh38_1.7", "Panel 3") == (
+        "GRCh38_1.7",
+        "3",
+        "1.0",
+        "hash3",
+        "fp1",
+    )
+    taken = store.take("GRCh38_1.7", ["Panel 5", "Panel 1"])
+    assert list(pd.unique(taken["Name"].astype(str))) == ["Panel 5", "Panel 1"]
+    assert len(taken) == 2 * len(metrics)
+
+
+def test_panel_names_are_looked_up_by_their_safe_name():
+    assert safe_panel_name(" Hereditary cancer (BRCA1/2) ") == (
+        "Hereditary_cancer__BRCA1_2_"
+    )
+    assert combo_name("1.7_GRCh38") == "GRCh38_1.7"
+    assert combo_name("GRCh38") is None
+    assert combo_name(None) is None
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+from baseline import variant_table
+
+from cadd_threshold_app.modules.labels import categorize_label
+from cadd_threshold_app.modules.phred_histogram import PhredHistogram
+
+
+@pytest.fixture(scope="module")
+def scored():
+    df = variant_table()
+    # the edges of the bins: 0 and 99.x are binned, 100 and above are not
+    df.loc[:4, "PHRED"] = [0.0, 99.999, 100.0, -1.0, 10.0]
+    return df
+
+
+def rowwise_binned(df: pd.DataFrame, steps: int) -> pd.DataFrame:
+    """The PHRED bar plot counts as computed before the histogram."""
+    labels = [f"{i}-{i + steps}" for i in range(0, 100, steps)]
+    data = df.assign(
+        category=df["ClinicalSignificance"].apply(categorize_label),
+        score_bin=pd.cut(
+            df["PHRED"],
+            bins=range(0, 100 + steps, steps),
+            labels=labels,
+            include_lowest=True,
+            right=False,
+        ),
+    )
+    grouped = (
+        data.groupby(["score_bin", "category"], observed=True)
+        .size()
+        .unstack(fill_value=0)
+    )
+    return grouped.reindex(labels, fill_value=0)
+
+
+@pytest.mark.parametrize("steps", [1, 5, 10, 20, 25, 50, 100])
+def test_binned_matches_rowwise_cut(scored, steps):
+    binned = PhredHistogram.from_frame(scored).binned(steps)
+    expected = rowwise_binned(scored, steps)
+    assert list(binned.index.astype(str)) == list(expected.index.astype(str))
+    assert list(binned.columns.astype(str)) == list(expected.columns.astype(str))
+    assert (binned.to_numpy() == expected.to_numpy()).all()
+
+
+def test_binned_rejects_widths_that_do_not_divide_100(scored):
+    with pytest.raises(ValueError):
+        PhredHistogram.from_frame(scored).binned(30)
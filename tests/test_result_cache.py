@@ -0,0 +1,57 @@
+import pandas as pd
+
+from cadd_threshold_app.modules.result_cache import GeneSetResultCache
+
+
+def counting(df):
+    calls = []
+
+    def compute():
+        calls.append(True)
+        return df
+
+    return calls, compute
+
+
+def test_key_ignores_gene_order_case_and_duplicates():
+    cache = GeneSetResultCache()
+    key = cache.key("metrics", "GRCh38-v1.7", ["BRCA1", "TP53"])
+    assert cache.key("metrics", "GRCh38-v1.7", ["tp53", "brca1", "TP53"]) == key
+    assert cache.key("labels", "GRCh38-v1.7", ["BRCA1", "TP53"]) != key
+    assert cache.key("metrics", "GRCh37-v1.7", ["BRCA1", "TP53"]) != key
+    assert cache.key("metrics", "GRCh38-v1.7", ["BRCA1"]) != key
+
+
+def test_key_includes_the_data_fingerprint():
+    fingerprints = {"GRCh38-v1.7": "a"}
+    cache = GeneSetResultCache(fingerprint=fingerprints.__getitem__)
+    key = cache.key("metrics", "GRCh38-v1.7", ["TP53"])
+    fingerprints["GRCh38-v1.7"] = "b"
+    assert cache.key("metrics", "GRCh38-v1.7", ["TP53"]) != key
+
+
+def test_equal_gene_sets_share_one_entry():
+    df = pd.DataFrame({"Threshold": [1.0, 2.0], "Recall": [0.5, 0.25]})
+    calls, compute = counting(df)
+    cache = GeneSetResultCache()
+    assert cache.get("metrics", "GRCh38-v1.7", ["TP53", "BRCA1"], compute) is df
+    assert cache.get("metrics", "GRCh38-v1.7", ["brca1", "tp53"], compute) is df
+    assert len(calls) == 1
+    cache.get("labels", "GRCh38-v1.7", ["TP53", "BRCA1"], compute)
+    assert len(calls) == 2
+
+
+def test_results_survive_restarts_in_the_directory(tmp_path):
+    df = pd.DataFrame({"Threshold": [1.0, 2.0], "Recall": [0.5, 0.25]})
+    calls, compute = counting(df)
+    GeneSetResultCache(directory=tmp_path).get("metrics", "v", ["TP53"], compute)
+
+    restarted = GeneSetResultCache(directory=tmp_path)
+    loaded = restarted.get("metrics", "v", ["tp53"], compute)
+    assert len(calls) == 1
+    assert restarted.disk_hits == 1
+    pd.testing.assert_frame_equal(loaded, df)
+
+    stale = GeneSetResultCache(directory=tmp_path, fingerprint=lambda version: "new")
+    stale.get("metrics", "v", ["TP53"], compute)
+    assert len(calls) == 2
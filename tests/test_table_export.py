@@ -0,0 +1,96 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+
+from cadd_threshold_app.modules.table_export import (
+    export_filename,
+    export_media_type,
+    gzip_chunks,
+    iter_csv_chunks,
+    iter_export_chunks,
+    iter_feather_chunks,
+    iter_parquet_chunks,
+)
+
+
+@pytest.fixture
+def table():
+    n = 23
+    return pd.DataFrame(
+        {
+            "GeneName": pd.Categorical(
+                ["BRCA1", "TP53", "MLH1;MSH2"] * 7 + ["BRCA1", None],
+                categories=["BRCA1", "MLH1;MSH2", "TP53", "UNUSED"],
+            ),
+            "PHRED": np.linspace(0, 50, n).astype(np.float32),
+            "Pos": np.arange(n, dtype=np.int64) * 1_000,
+            "Name": [f'variant "{i}", c.{i}A>G' for i in range(n)],
+        }
+    )
+
+
+def test_csv_chunks_equal_the_whole_csv(table):
+    chunks = list(iter_csv_chunks(table, chunk_rows=5))
+    assert len(chunks) == 1 + 5
+    assert "".join(chunks) == table.to_csv(index=False)
+
+
+def test_csv_gz_round_trip(table):
+    data = b"".join(iter_export_chunks(table, "csv.gz"))
+    assert gzip.decompress(data).decode("utf-8") == table.to_csv(index=False)
+
+
+def test_gzip_chunks_compress_a_text_stream():
+    text = ["a,b\n"] + [f"{i},{i * i}\n" for i in range(1_000)]
+    assert gzip.decompress(b"".join(gzip_chunks(text))).decode() == "".join(text)
+
+
+def test_empty_table_exports_the_header(table):
+    empty = table.iloc[:0]
+    assert "".join(iter_export_chunks(empty, "csv")) == empty.to_csv(index=False)
+    assert list(pd.read_csv(io.StringIO("".join(iter_csv_chunks(empty))))) == list(
+        table.columns
+    )
+
+
+def expected_arrow_table(table):
+    # exports drop the categories no row uses
+    return table.assign(GeneName=table["GeneName"].cat.remove_unused_categories())
+
+
+def test_parquet_round_trip_keeps_dtypes(table):
+    data = b"".join(iter_parquet_chunks(table, chunk_rows=5))
+    assert pq.ParquetFile(io.BytesIO(data)).metadata.num_row_groups == 5
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(io.BytesIO(data)), expected_arrow_table(table)
+    )
+
+
+def test_feather_round_trip_keeps_dtypes(table):
+    chunks = list(iter_feather_chunks(table, chunk_rows=5))
+    assert len(chunks) > 2
+    pd.testing.assert_frame_equal(
+        feather.read_feather(io.BytesIO(b"".join(chunks))),
+        expected_arrow_table(table),
+    )
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_binary_exports_of_an_empty_table(table, fmt):
+    data = b"".join(iter_export_chunks(table.iloc[:0], fmt))
+    read = pd.read_parquet if fmt == "parquet" else feather.read_feather
+    assert list(read(io.BytesIO(data)).columns) == list(table.columns)
+
+
+def test_export_names():
+    assert export_filename("1.7_GRCh38_2_genes_metrics", "csv.gz") == (
+        "1.7_GRCh38_2_genes_metrics.csv.gz"
+    )
+    assert export_media_type("parquet") == "application/vnd.apache.parquet"
+    # unknown formats fall back to CSV
+    assert export_filename("x", "xlsx") == "x.csv"
@@ -0,0 +1,77 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from baseline import GENE_SETS, rowwise_filter
+from sklearn.metrics import (
+    accuracy_score,
+    balanced_accuracy_score,
+    confusion_matrix,
+    f1_score,
+    precision_score,
+    recall_score,
+)
+
+from cadd_threshold_app.modules.gene_index import GeneIndex
+from cadd_threshold_app.modules.labels import categorize_label
+from cadd_threshold_app.modules.threshold_cube import ThresholdCountCube
+from cadd_threshold_app.modules.threshold_metrics import METRIC_COLUMNS, THRESHOLDS
+
+
+def rowwise_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """The per-threshold metrics as computed before the count cube, one threshold at a time."""
+    categories = df["ClinicalSignificance"].apply(categorize_label)
+    y_true = np.where(
+        categories.isin(["pathogenic", "likely pathogenic"]), "pathogenic", "benign"
+    )
+    rows = []
+    for threshold in THRESHOLDS:
+        row = dict.fromkeys(METRIC_COLUMNS, 0)
+        row["Threshold"] = int(threshold)
+        if len(df):
+            y_pred = np.where(df["PHRED"] <= threshold, "benign", "pathogenic")
+            tn, fp, fn, tp = confusion_matrix(
+                y_true, y_pred, labels=["benign", "pathogenic"]
+            ).ravel()
+            precision = precision_score(
+                y_true, y_pred, pos_label="pathogenic", zero_division=0
+            )
+            recall = recall_score(
+                y_true, y_pred, pos_label="pathogenic", zero_division=0
+            )
+            with warnings.catch_warnings():
+                # single-class ground truths are expected for small gene sets
+                warnings.simplefilter("ignore", UserWarning)
+                balanced_accuracy = balanced_accuracy_score(y_true, y_pred)
+            row.update(
+                TrueNegatives=tn,
+                FalsePositives=fp,
+                FalseNegatives=fn,
+                TruePositives=tp,
+                Precision=precision,
+                Recall=recall,
+                F1Score=f1_score(
+                    y_true, y_pred, pos_label="pathogenic", zero_division=0
+                ),
+                F2Score=(
+                    (5 * precision * recall) / (4 * precision + recall)
+                    if precision + recall
+                    else 0
+                ),
+                Accuracy=accuracy_score(y_true, y_pred),
+                BalancedAccuracy=balanced_accuracy,
+                FalsePositiveRate=fp / (fp + tn) if fp + tn else 0,
+                Specificity=tn / (tn + fp) if tn + fp else 0,
+            )
+        rows.append(row)
+    return pd.DataFrame(rows, columns=METRIC_COLUMNS)
+
+
+@pytest.mark.parametrize("genes", GENE_SETS)
+def test_count_cube_matches_rowwise_metrics(variants, genes):
+    cube = ThresholdCountCube.from_frame(variants, GeneIndex.from_frame(variants))
+    expected = rowwise_metrics(rowwise_filter(variants, genes))
+    pd.testing.assert_frame_equal(
+        cube.metrics(genes), expected, check_dtype=False, rtol=1e-12, atol=1e-12
+    )